@@ -4,13 +4,16 @@ from typing import TYPE_CHECKING, Optional, Tuple
 
 import color
 import exceptions
+from entity import Item
 
 if TYPE_CHECKING:
     from engine import Engine
-    from entity import Entity, Actor, Item
+    from entity import Entity, Actor
 
 
 class Action:
+    __slots__ = ("entity",)
+
     def __init__(self, entity: Actor) -> None:
         super().__init__()
         self.entity = entity
@@ -71,6 +74,9 @@ class MeleeAction(ActionWithDirection):
             attack_color = color.enemy_atk
 
         self.engine.sound_manager.queueSfx("pling")
+        if self.entity is self.engine.player:
+            # fighting is loud, and wakes up actors far beyond the player's surroundings
+            self.engine.make_noise(self.entity.x, self.entity.y, radius=40)
         if damage > 0:
             self.engine.message_log.add_message(
                 f"{attack_desc} for {damage} hit points", attack_color
@@ -87,7 +93,7 @@ class MovementAction(ActionWithDirection):
         if not self.engine.game_map.in_bounds(dest_x, dest_y):
             #destination out of bounds, prevent movement
             raise exceptions.Impossible("That way is blocked")
-        if not self.engine.game_map.tiles["walkable"][dest_x, dest_y]:
+        if not self.engine.game_map.get_tile(dest_x, dest_y)["walkable"]:
             #destination not walkable, prevent movement
             raise exceptions.Impossible("That way is blocked")
         if self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y):
@@ -137,14 +143,17 @@ class PickupAction(Action):
         actor_location_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
+        for item in self.engine.game_map.get_entities_at_location(
+                actor_location_x, actor_location_y
+        ):
+            if isinstance(item, Item):
                 if len(inventory.items) >= inventory.capacity:
                     raise exceptions.Impossible("Your inventory is full")
 
-                self.engine.game_map.entities.remove(item)
+                self.engine.game_map.remove_entity(item)
                 item.parent = self.entity.inventory
                 inventory.items.append(item)
+                self.entity.mark_changed()
 
                 self.engine.message_log.add_message(f"You picked up the {item.name}")
                 self.engine.sound_manager.queueSfx("pick")
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from entity import Actor, Entity
+
+# the int fields of an actor and its fighter that are held in the store
+STORED_FIELDS = ("x", "y", "hp", "max_hp", "base_power", "base_defense")
+
+def get_slot_state(obj: Any) -> dict:
+    """
+    return the values of the slots of an object that are set, by name
+    the same as the slot state of object.__getstate__, which only exists from Python 3.11
+    """
+    state = {}
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            if name not in state and name not in ("__dict__", "__weakref__") and hasattr(obj, name):
+                state[name] = getattr(obj, name)
+    return state
+
+class StoredField:
+    """
+    An int attribute of an actor or its fighter. While the actor is attached to an actor store
+    the value lives in the store's array, otherwise in the private slot of the same name
+    with a leading underscore
+    """
+
+    def __init__(self, field: str, on_parent: bool = False):
+        self.field = field
+        self.slot = f"_{field}"
+        # components find their actor through their parent
+        self.on_parent = on_parent
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        actor = instance.parent if self.on_parent else instance
+        if actor.store is None:
+            return getattr(instance, self.slot)
+        return int(getattr(actor.store, self.field)[actor.store_index])
+
+    def __set__(self, instance: Any, value: int) -> None:
+        actor = instance.parent if self.on_parent else instance
+        if actor.store is None:
+            setattr(instance, self.slot, value)
+        else:
+            getattr(actor.store, self.field)[actor.store_index] = value
+        actor.mark_changed()
+
+class ActorStore:
+    """
+    Structure of arrays holding the positions and combat stats of the actors on a map
+    Attached actors and their fighters read and write these arrays instead of their own slots,
+    so queries over all actors can run vectorized. Rows of detached actors are reused
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.hp = np.zeros(capacity, dtype=np.int32)
+        self.max_hp = np.zeros(capacity, dtype=np.int32)
+        self.base_power = np.zeros(capacity, dtype=np.int32)
+        self.base_defense = np.zeros(capacity, dtype=np.int32)
+        self.occupied = np.zeros(capacity, dtype=bool)
+
+        self.actors: List[Optional[Actor]] = [None] * capacity
+        # free rows, popped from the end so the lowest rows are used first
+        self.free = list(range(capacity - 1, -1, -1))
+
+    def grow(self) -> None:
+        """double the capacity of the store"""
+        capacity = len(self.actors)
+        for field in STORED_FIELDS + ("occupied",):
+            array = getattr(self, field)
+            setattr(self, field, np.concatenate([array, np.zeros_like(array)]))
+        self.actors.extend([None] * capacity)
+        self.free = list(range(2 * capacity - 1, capacity - 1, -1)) + self.free
+
+    def attach(self, actor: Actor) -> None:
+        """move the stored fields of an actor into the store"""
+        if actor.store is self:
+            return
+        if actor.store is not None:
+            actor.store.detach(actor)
+        if not self.free:
+            self.grow()
+        index = self.free.pop()
+
+        fighter = actor.fighter
+        self.x[index], self.y[index] = actor.x, actor.y
+        self.hp[index], self.max_hp[index] = fighter.hp, fighter.max_hp
+        self.base_power[index], self.base_defense[index] = fighter.base_power, fighter.base_defense
+        self.occupied[index] = True
+        self.actors[index] = actor
+
+        actor.store, actor.store_index = self, index
+
+    def sync(self, actor: Actor) -> None:
+        """copy the stored fields of an attached actor back into its own slots"""
+        index = actor.store_index
+        fighter = actor.fighter
+        actor._x, actor._y = int(self.x[index]), int(self.y[index])
+        fighter._hp, fighter._max_hp = int(self.hp[index]), int(self.max_hp[index])
+        fighter._base_power = int(self.base_power[index])
+        fighter._base_defense = int(self.base_defense[index])
+
+    def detach(self, actor: Actor) -> None:
+        """move the stored fields of an actor back into the actor"""
+        if actor.store is not self:
+            return
+        self.sync(actor)
+        index = actor.store_index
+        self.occupied[index] = False
+        self.actors[index] = None
+        self.free.append(index)
+        actor.store, actor.store_index = None, None
+
+    def rebuild_rows(self, entities: Iterable[Entity]) -> None:
+        """rebuild the actor of each row and the free rows from the entities attached to the store, after loading"""
+        self.actors = [None] * len(self.occupied)
+        for entity in entities:
+            if getattr(entity, "store", None) is self:
+                self.actors[entity.store_index] = entity
+        self.free = [index for index in range(len(self.occupied) - 1, -1, -1) if not self.occupied[index]]
+
+    def get_living(self) -> np.ndarray:
+        """return a mask of the rows holding actors with hp left"""
+        return self.occupied & (self.hp > 0)
+
+    def get_actors(self, indices: Iterable[int]) -> List[Actor]:
+        return [self.actors[index] for index in indices]
+
+    def get_actors_within(self, x: int, y: int, radius: float) -> List[Actor]:
+        """return the living actors whose distance to x, y is at most `radius`"""
+        distance_squared = (self.x - x) ** 2 + (self.y - y) ** 2
+        return self.get_actors(np.flatnonzero(self.get_living() & (distance_squared <= radius ** 2)))
+
+    def get_actors_in(self, mask: np.ndarray) -> List[Actor]:
+        """return the living actors standing on a tile that is True in the 2d `mask`, e.g. the visible tiles"""
+        living = np.flatnonzero(self.get_living())
+        return self.get_actors(living[mask[self.x[living], self.y[living]]])
+
+    def apply_damage(self, actors: Iterable[Actor], amount: int) -> None:
+        """damage attached actors in one pass. Actors that drop to 0 hp die in the given order"""
+        indices = np.array([actor.store_index for actor in actors], dtype=np.intp)
+        self.hp[indices] = np.maximum(0, self.hp[indices] - amount)
+        for index in indices[self.hp[indices] == 0]:
+            actor = self.actors[index]
+            if actor.ai:
+                actor.fighter.die()
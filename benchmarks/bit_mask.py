@@ -0,0 +1,54 @@
+"""
+compare the memory and access cost of bit packed masks against bool arrays
+run from the project root: python benchmarks/bit_mask.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bit_mask import BitMask
+
+MAP_SIZES = ((80, 43), (1000, 1000), (4000, 4000))
+# the part of the map shown on screen, unpacked once per frame
+VIEWPORT = (slice(100, 180), slice(101, 144))
+# the box around the player a field of view with radius 8 covers
+FOV_BOX = (slice(300, 317), slice(203, 220))
+REPEATS = 2000
+
+def time_per_call(function) -> float:
+    """return the time of one call in microseconds"""
+    return timeit.timeit(function, number=REPEATS) / REPEATS * 1e6
+
+def main() -> None:
+    print("memory of the visible and explored masks")
+    for width, height in MAP_SIZES:
+        array = np.zeros((width, height), dtype=bool)
+        mask = BitMask((width, height))
+        print(f"  {width}x{height}: bool {2 * array.nbytes:>10} bytes, packed {2 * mask.nbytes:>9} bytes")
+
+    rng = np.random.default_rng(0)
+    array = rng.random((1000, 1000)) > 0.5
+    mask = BitMask.from_array(array)
+    visible = rng.random((17, 17)) > 0.5
+
+    print("cost per call on a 1000x1000 map")
+    print(f"  viewport read:  bool {time_per_call(lambda: array[VIEWPORT]):6.1f} us, "
+          f"packed {time_per_call(lambda: mask[VIEWPORT]):6.1f} us")
+
+    def merge_array() -> None:
+        array[FOV_BOX] |= visible
+
+    def merge_mask() -> None:
+        mask[FOV_BOX] |= visible
+
+    print(f"  fov box merge:  bool {time_per_call(merge_array):6.1f} us, "
+          f"packed {time_per_call(merge_mask):6.1f} us")
+    print(f"  single cell:    bool {time_per_call(lambda: array[150, 120]):6.1f} us, "
+          f"packed {time_per_call(lambda: mask[150, 120]):6.1f} us")
+
+if __name__ == "__main__":
+    main()
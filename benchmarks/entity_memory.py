@@ -0,0 +1,61 @@
+"""
+measure the memory used by spawned entities, in memory and when pickled, with slots against
+the same entities held in a __dict__ per object
+run from the project root: python benchmarks/entity_memory.py
+"""
+import os
+import pickle
+import sys
+import tracemalloc
+import warnings
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+warnings.simplefilter("ignore") # tcod deprecation warnings from the tileset setup
+
+from actor_store import get_slot_state
+import entity_factories
+
+NUMBER_OF_ORCS = 10_000
+
+class Unslotted:
+    """an object holding the attributes of a slotted object in its __dict__, the layout without slots"""
+
+def unslot(obj: Any, copies: Dict[int, Any]) -> Any:
+    """return a copy of `obj` with every slotted object in it replaced by an Unslotted one"""
+    if isinstance(obj, list):
+        return [unslot(value, copies) for value in obj]
+    if hasattr(obj, "__dict__") or not hasattr(type(obj), "__slots__"):
+        # immutable values and objects without slots are shared, as they are between clones
+        return obj
+    copy = copies.get(id(obj))
+    if copy is None:
+        # entities and their components refer to each other through their parents
+        copy = copies[id(obj)] = Unslotted()
+        copy.__dict__.update({name: unslot(value, copies) for name, value in get_slot_state(obj).items()})
+    return copy
+
+def measure(build: Callable[[], List[Any]]) -> Tuple[List[Any], int]:
+    """return the objects made by `build` and the memory they take"""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    objects = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objects, after - before
+
+def main() -> None:
+    orcs, slotted_memory = measure(
+        lambda: [entity_factories.orc.clone() for _ in range(NUMBER_OF_ORCS)]
+    )
+    unslotted, unslotted_memory = measure(lambda: [unslot(orc, {}) for orc in orcs])
+
+    print(f"{NUMBER_OF_ORCS} orcs, bytes per orc")
+    print(f"  slotted:   in memory {slotted_memory / NUMBER_OF_ORCS:6.0f}, "
+          f"pickled {len(pickle.dumps(orcs)) / NUMBER_OF_ORCS:6.0f}")
+    print(f"  unslotted: in memory {unslotted_memory / NUMBER_OF_ORCS:6.0f}, "
+          f"pickled {len(pickle.dumps(unslotted)) / NUMBER_OF_ORCS:6.0f}")
+
+if __name__ == "__main__":
+    main()
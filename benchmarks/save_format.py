@@ -0,0 +1,89 @@
+"""
+compare save and load latency and file size of the columnar snapshot against a pickle of the engine
+run from the project root: python benchmarks/save_format.py
+"""
+import lzma
+import mmap
+import os
+import pickle
+import sys
+import tempfile
+import time
+import warnings
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.simplefilter("ignore") # tcod deprecation warnings from the tileset setup
+
+import color
+import columnar
+import setup_game
+
+REPEATS = 5
+FLOORS = 5
+MESSAGES = 2000
+
+def make_engine(game_type: int):
+    engine = setup_game.new_game(game_type)
+    if game_type == 1:
+        for _ in range(FLOORS):
+            engine.game_world.generate_floor()
+        engine.update_fov()
+    for i in range(MESSAGES):
+        engine.message_log.add_message(f"The orc hits you for {i % 7} damage", color.enemy_atk)
+    return engine
+
+def time_ms(function) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        function()
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+def benchmark(engine, directory: str) -> None:
+    filename = os.path.join(directory, "save")
+
+    def save_pickle() -> None:
+        with open(filename, "wb") as f:
+            f.write(lzma.compress(pickle.dumps(engine)))
+
+    def load_pickle() -> None:
+        with open(filename, "rb") as f:
+            pickle.loads(lzma.decompress(f.read()))
+
+    save = time_ms(save_pickle)
+    load = time_ms(load_pickle)
+    print(f"  pickle+lzma     save {save:6.1f} ms  load {load:6.1f} ms  {os.path.getsize(filename):>8} bytes")
+
+    for codec in columnar.CODECS:
+        def save_columnar() -> None:
+            with open(filename, "wb") as f:
+                columnar.write_snapshot(f, engine, [], codec)
+
+        def load_columnar() -> None:
+            with open(filename, "rb") as f:
+                columnar.read_snapshot(memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)))
+
+        save = time_ms(save_columnar)
+        load = time_ms(load_columnar)
+        print(f"  columnar {codec:<6} save {save:6.1f} ms  load {load:6.1f} ms  {os.path.getsize(filename):>8} bytes")
+
+    def save_as() -> None:
+        if os.path.exists(filename):
+            os.remove(filename)
+        engine.save_file = None
+        engine.save_as(filename)
+
+    save = time_ms(save_as)
+    load = time_ms(lambda: setup_game.load_game(filename))
+    print(f"  save_as         save {save:6.1f} ms  load {load:6.1f} ms  {os.path.getsize(filename):>8} bytes")
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"dungeon, {FLOORS + 1} floors visited, {MESSAGES} messages")
+        benchmark(make_engine(1), directory)
+        print(f"overworld, {MESSAGES} messages")
+        benchmark(make_engine(2), directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import operator
+from typing import Any, Tuple, Union
+
+import numpy as np
+
+class BitMask:
+    """
+    A 2d boolean array stored with 8 cells per byte, packed along the second (y) axis
+    Indexing with two ints or two int arrays reads single cells. Indexing with slices reads or
+    writes a region as a regular bool array, only unpacking the bytes the region covers, so
+    `mask[region] |= values` merges into a region
+    Indices are checked against the shape like for a bool array, the padding bits of the last
+    byte can't be indexed
+    """
+
+    def __init__(self, shape: Tuple[int, int], fill_value: bool = False):
+        width, height = shape
+        self.shape = (width, height)
+        self.bits = np.full((width, (height + 7) // 8), 0xFF if fill_value else 0, dtype=np.uint8)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> BitMask:
+        mask = cls.__new__(cls)
+        mask.shape = array.shape
+        mask.bits = np.packbits(array, axis=1)
+        return mask
+
+    def to_array(self) -> np.ndarray:
+        return np.unpackbits(self.bits, axis=1, count=self.shape[1]).astype(bool)
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> np.ndarray:
+        array = self.to_array()
+        return array if dtype is None else array.astype(dtype)
+
+    def copy(self) -> BitMask:
+        mask = BitMask.__new__(BitMask)
+        mask.shape = self.shape
+        mask.bits = self.bits.copy()
+        return mask
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def fill(self, value: bool) -> None:
+        self.bits[...] = 0xFF if value else 0
+
+    def __ior__(self, other: BitMask) -> BitMask:
+        """merge a mask of the same shape into this one, a byte at a time"""
+        self.bits |= other.bits
+        return self
+
+    def get_byte_range(self, y: slice) -> Tuple[slice, slice]:
+        """
+        return the slice of bytes covering the cells of `y`, and the slice of those cells
+        within the unpacked bytes. Only contiguous slices are supported
+        """
+        start, stop, step = y.indices(self.shape[1])
+        if step != 1:
+            raise ValueError("bit masks only support slices with a step of 1")
+        stop = max(start, stop)
+        first_byte = start // 8
+        return (
+            slice(first_byte, (stop + 7) // 8),
+            slice(start - first_byte * 8, stop - first_byte * 8),
+        )
+
+    def get_cell_index(self, y: Any) -> Any:
+        """
+        return the y index of single cells, with negative indices counted from the end
+        raises IndexError outside of the mask, like a bool array would
+        """
+        height = self.shape[1]
+        if isinstance(y, (np.ndarray, list)):
+            y = np.asarray(y)
+            if ((y < -height) | (y >= height)).any():
+                raise IndexError(f"index out of bounds for axis 1 with size {height}")
+            return np.where(y < 0, y + height, y)
+        y = operator.index(y)
+        if not -height <= y < height:
+            raise IndexError(f"index {y} is out of bounds for axis 1 with size {height}")
+        return y + height if y < 0 else y
+
+    def __getitem__(self, key: Tuple[Any, Any]) -> Union[bool, np.ndarray]:
+        x, y = key
+        if isinstance(y, slice):
+            byte_range, cells = self.get_byte_range(y)
+            return np.unpackbits(self.bits[x, byte_range], axis=-1)[..., cells].astype(bool)
+        if isinstance(x, slice):
+            raise ValueError("bit masks only support slicing along both axes, or along y")
+        y = self.get_cell_index(y)
+        cell_bits = (self.bits[x, y >> 3] >> (7 - (y & 7))) & 1
+        if isinstance(cell_bits, np.ndarray):
+            return cell_bits.astype(bool)
+        return bool(cell_bits)
+
+    def __setitem__(self, key: Tuple[Any, Any], value: Any) -> None:
+        x, y = key
+        if isinstance(y, slice):
+            # unpack the covered bytes, write the cells and pack them again
+            byte_range, cells = self.get_byte_range(y)
+            block = np.unpackbits(self.bits[x, byte_range], axis=-1)
+            block[..., cells] = value
+            self.bits[x, byte_range] = np.packbits(block, axis=-1)
+            return
+        y = self.get_cell_index(y)
+        bit = np.uint8(1 << (7 - (y & 7)))
+        if value:
+            self.bits[x, y >> 3] |= bit
+        else:
+            self.bits[x, y >> 3] &= ~bit
@@ -1,3 +1,6 @@
+from typing import Tuple
+
+
 class Camera:
     def __init__(self, x: int, y: int, width: int, height: int, map_width: int, map_height: int):
         self.x = x
@@ -15,6 +18,24 @@ class Camera:
     def in_bounds(self, x: int, y: int) -> bool:
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def get_views(
+            self, map_width: int, map_height: int
+    ) -> Tuple[Tuple[slice, slice], Tuple[slice, slice]]:
+        """
+        return the (console, map) 2d array indexes of the part of a map that is on screen
+        both indexes have the same shape, clipped to the edges of the map and the camera
+        """
+        map_x1 = max(0, -self.x)
+        map_y1 = max(0, -self.y)
+        map_x2 = max(map_x1, min(map_width, self.width - self.x))
+        map_y2 = max(map_y1, min(map_height, self.height - self.y))
+
+        screen_view = (
+            slice(map_x1 + self.x, map_x2 + self.x), slice(map_y1 + self.y, map_y2 + self.y)
+        )
+        map_view = slice(map_x1, map_x2), slice(map_y1, map_y2)
+        return screen_view, map_view
+
     def update(self, entity):
         x = -entity.x + int(self.width / 2)
         y = -entity.y + int(self.height / 2)
@@ -0,0 +1,289 @@
+"""
+A columnar snapshot of the engine: the map arrays as raw buffers, the entities as a flat typed
+table, the message log as a table over a string block, and a pickle of the remaining object
+graph that refers to all of these by name or row
+"""
+from __future__ import annotations
+
+import io
+import json
+import lzma
+import mmap
+import pickle
+import struct
+import zlib
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from entity import Actor, Entity, Item
+from message_log import Message
+from render_order import RenderOrder
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+CODECS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "none": (bytes, bytes),
+    "zlib": (zlib.compress, zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+HEADER_LENGTH = struct.Struct("<I")
+
+# the row of an entity is its key in the save file
+ENTITY_CLASSES = (Entity, Actor, Item)
+ENTITY_DT = np.dtype([
+    ("class", np.uint8), # index into ENTITY_CLASSES
+    ("x", np.int32),
+    ("y", np.int32),
+    ("char", np.int32), # index into the string block
+    ("color", "3B"),
+    ("name", np.int32), # index into the string block
+    ("blocks_movement", np.bool_),
+    ("render_order", np.uint8),
+])
+MESSAGE_DT = np.dtype([
+    ("text", np.int32), # index into the string block
+    ("fg", "3B"),
+    ("count", np.int32),
+])
+
+class SnapshotPickler(pickle.Pickler):
+    """pickles the object graph with the arrays, entities and messages of the snapshot as references"""
+
+    def __init__(self, file: io.BytesIO, snapshot: SnapshotWriter):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.snapshot = snapshot
+
+    def persistent_id(self, obj: Any) -> Optional[Tuple]:
+        snapshot = self.snapshot
+        if isinstance(obj, np.ndarray):
+            name = snapshot.array_names.get(id(obj))
+            return ("array", name) if name else None
+        if isinstance(obj, Entity):
+            return ("entity", snapshot.get_key(obj))
+        if obj is snapshot.messages:
+            return ("messages",)
+        return None
+
+class SnapshotUnpickler(pickle.Unpickler):
+    def __init__(
+            self, file: io.BytesIO, arrays: Dict[str, np.ndarray], entities: List[Entity], messages: List[Message]
+    ):
+        super().__init__(file)
+        self.arrays = arrays
+        self.entities = entities
+        self.messages = messages
+
+    def persistent_load(self, pid: Tuple) -> Any:
+        kind = pid[0]
+        if kind == "array":
+            return self.arrays[pid[1]]
+        if kind == "entity":
+            return self.entities[pid[1]]
+        if kind == "messages":
+            return self.messages
+        raise pickle.UnpicklingError(f"unknown persistent id {pid}")
+
+class SnapshotWriter:
+    def __init__(self, engine: Engine, entities: List[Entity]):
+        self.engine = engine
+        # entities referenced while pickling are appended, so their row is their key
+        self.entities = entities
+        self.keys = {id(entity): key for key, entity in enumerate(entities)}
+        self.messages = engine.message_log.messages
+        self.strings: List[str] = []
+        self.string_ids: Dict[str, int] = {}
+
+        game_map = engine.game_map
+        self.arrays: Dict[str, np.ndarray] = {
+            "tiles": game_map.tiles,
+            "explored": game_map.explored.bits,
+            "visible": game_map.visible.bits,
+        }
+        if getattr(game_map, "generated_tiles", None) is not None:
+            self.arrays["generated_tiles"] = game_map.generated_tiles
+        if game_map.actor_store is not None:
+            for field, array in vars(game_map.actor_store).items():
+                if isinstance(array, np.ndarray):
+                    self.arrays[f"actor_store.{field}"] = array
+        self.array_names = {id(array): name for name, array in self.arrays.items()}
+
+    def get_key(self, entity: Entity) -> int:
+        key = self.keys.get(id(entity))
+        if key is None:
+            key = self.keys[id(entity)] = len(self.entities)
+            self.entities.append(entity)
+        return key
+
+    def get_string_id(self, string: str) -> int:
+        string_id = self.string_ids.get(string)
+        if string_id is None:
+            string_id = self.string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def get_sections(self) -> Dict[str, np.ndarray]:
+        """return every section of the snapshot as an array, the map arrays are not copied"""
+        file = io.BytesIO()
+        pickler = SnapshotPickler(file, self)
+        pickler.dump(self.engine)
+
+        # the state of each entity without its table columns, in row order
+        rows = []
+        key = 0
+        while key < len(self.entities):
+            entity = self.entities[key]
+            _, slot_state = entity.__getstate__()
+            rows.append((
+                ENTITY_CLASSES.index(type(entity)),
+                slot_state.pop("_x", None) if "_x" in slot_state else slot_state.pop("x"),
+                slot_state.pop("_y", None) if "_y" in slot_state else slot_state.pop("y"),
+                self.get_string_id(slot_state.pop("char")),
+                slot_state.pop("color"),
+                self.get_string_id(slot_state.pop("name")),
+                slot_state.pop("blocks_movement"),
+                slot_state.pop("render_order").value,
+            ))
+            pickler.dump(slot_state)
+            key += 1
+
+        messages = np.array(
+            [(self.get_string_id(m.plain_text), m.fg, m.count) for m in self.messages], dtype=MESSAGE_DT
+        )
+        encoded = [string.encode() for string in self.strings]
+        return {
+            **self.arrays,
+            "entities": np.array(rows, dtype=ENTITY_DT),
+            "messages": messages,
+            "string_offsets": np.cumsum([0] + [len(string) for string in encoded], dtype=np.int64),
+            "strings": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "objects": np.frombuffer(file.getvalue(), dtype=np.uint8),
+        }
+
+def take_snapshot(engine: Engine, entities: List[Entity]) -> Dict[str, np.ndarray]:
+    """
+    return the sections of a snapshot of the engine, independent of any later changes to it
+    `entities` gives the row of the first entities, other referenced entities are appended to it
+    """
+    sections = SnapshotWriter(engine, entities).get_sections()
+    return {name: array.copy(order="K") for name, array in sections.items()}
+
+def write_snapshot(file: BinaryIO, engine: Engine, entities: List[Entity], codec: str = "zlib") -> None:
+    """write a snapshot of the engine to a file, see take_snapshot"""
+    write_sections(file, SnapshotWriter(engine, entities).get_sections(), codec)
+
+def write_sections(file: BinaryIO, sections: Dict[str, np.ndarray], codec: str = "zlib") -> None:
+    """compress the sections of a snapshot and write them to a file"""
+    compress, _ = CODECS[codec]
+    directory = {}
+    payloads = []
+    offset = 0
+    for name, array in sections.items():
+        fortran_order = array.flags.f_contiguous and not array.flags.c_contiguous
+        payload = compress(array.tobytes(order="F" if fortran_order else "C"))
+        directory[name] = {
+            "offset": offset,
+            "length": len(payload),
+            "dtype": np.lib.format.dtype_to_descr(array.dtype),
+            "shape": array.shape,
+            "fortran_order": fortran_order,
+        }
+        payloads.append(payload)
+        offset += len(payload)
+
+    header = json.dumps({"codec": codec, "sections": directory}).encode()
+    file.write(HEADER_LENGTH.pack(len(header)))
+    file.write(header)
+    for payload in payloads:
+        file.write(payload)
+
+def read_header(data: memoryview) -> Tuple[Dict[str, Any], int]:
+    """return the header of a snapshot, and the offset of the first section in `data`"""
+    (header_length,) = HEADER_LENGTH.unpack_from(data, 0)
+    data_start = HEADER_LENGTH.size + header_length
+    return json.loads(bytes(data[HEADER_LENGTH.size:data_start])), data_start
+
+def get_section(data: memoryview, header: Dict[str, Any], data_start: int, name: str) -> np.ndarray:
+    """
+    read a section of a snapshot. Uncompressed sections are used in place when `data` is
+    writable, e.g. a copy on write memory map of the save file, instead of being copied out of it
+    """
+    section = header["sections"][name]
+    dtype = np.lib.format.descr_to_dtype(section["dtype"])
+    shape = tuple(section["shape"])
+    order = "F" if section["fortran_order"] else "C"
+    start = data_start + section["offset"]
+    if header["codec"] == "none" and not data.readonly:
+        return np.frombuffer(data[start:start + section["length"]], dtype=dtype).reshape(shape, order=order)
+    _, decompress = CODECS[header["codec"]]
+    buffer = decompress(data[start:start + section["length"]])
+    return np.frombuffer(buffer, dtype=dtype).reshape(shape, order=order).copy(order=order)
+
+def read_section(data: memoryview, name: str) -> Optional[np.ndarray]:
+    """read a single section of a snapshot, or return None if it has no such section"""
+    header, data_start = read_header(data)
+    if name not in header["sections"]:
+        return None
+    return get_section(data, header, data_start, name)
+
+def read_snapshot(data: memoryview) -> Tuple[Engine, List[Entity]]:
+    """read a snapshot from `data`, and return the engine and the entities in row order"""
+    header, data_start = read_header(data)
+    sections = {name: get_section(data, header, data_start, name) for name in header["sections"]}
+
+    offsets = sections["string_offsets"]
+    string_block = sections["strings"].tobytes()
+    strings = [string_block[offsets[i]:offsets[i + 1]].decode() for i in range(len(offsets) - 1)]
+
+    messages = []
+    for text, fg, count in sections["messages"].tolist():
+        message = Message(strings[text], tuple(fg))
+        message.count = count
+        messages.append(message)
+
+    table = sections["entities"]
+    entities = [ENTITY_CLASSES[entity_class].__new__(ENTITY_CLASSES[entity_class]) for entity_class in table["class"]]
+
+    unpickler = SnapshotUnpickler(io.BytesIO(sections["objects"].tobytes()), sections, entities, messages)
+    engine = unpickler.load()
+    for entity, row in zip(entities, table.tolist()):
+        slot_state = unpickler.load()
+        _, x, y, char, color, name, blocks_movement, render_order = row
+        position = ("_x", "_y") if isinstance(entity, Actor) else ("x", "y")
+        slot_state.update({
+            position[0]: x,
+            position[1]: y,
+            "char": strings[char],
+            "color": tuple(color),
+            "name": strings[name],
+            "blocks_movement": blocks_movement,
+            "render_order": RenderOrder(render_order),
+        })
+        for slot, value in slot_state.items():
+            setattr(entity, slot, value)
+    return engine, entities
+
+def is_mapped(array: np.ndarray) -> bool:
+    """returns true if the array is a view of a memory map"""
+    base = array
+    while isinstance(base, np.ndarray):
+        base = base.base
+    if isinstance(base, memoryview):
+        base = base.obj
+    return isinstance(base, mmap.mmap)
+
+def release_mapped_arrays(engine: Engine) -> None:
+    """replace memory mapped arrays of the map with copies, so the file they map can be replaced"""
+    game_map = engine.game_map
+    for name in ("tiles", "generated_tiles"):
+        array = getattr(game_map, name, None)
+        if array is not None and is_mapped(array):
+            setattr(game_map, name, np.array(array, order="F"))
+    for mask in (game_map.explored, game_map.visible):
+        if is_mapped(mask.bits):
+            mask.bits = np.array(mask.bits)
+    if game_map.actor_store is not None:
+        for field, array in vars(game_map.actor_store).items():
+            if isinstance(array, np.ndarray) and is_mapped(array):
+                setattr(game_map.actor_store, field, np.array(array))
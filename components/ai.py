@@ -1,55 +1,58 @@
 from __future__ import annotations
 
+import copy
 import random
 from typing import List, Tuple, TYPE_CHECKING, Optional
 
-import numpy as np
-import tcod
-
 from actions import Action, MeleeAction, MovementAction, WaitAction, BumpAction
 
 if TYPE_CHECKING:
     from entity import Actor
 
 class BaseAI(Action):
+    __slots__ = ()
+
     entity: Actor
 
     def perform(self) -> None:
         raise NotImplementedError()
 
-    def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
+    def clone(self, entity: Actor) -> BaseAI:
+        """return a copy of this AI for another entity"""
+        clone = copy.copy(self)
+        clone.entity = entity
+        return clone
+
+    def translate(self, dx: int, dy: int) -> None:
+        """called when the coordinates of the map are shifted, e.g. by the overworld window"""
+
+    def get_path_to_player(self) -> List[Tuple[int, int]]:
         """
-        compute and return a path to the target position
+        return a path to the player, following the pathfinder shared by all AIs this turn
         If there is no valid path, return empty list
         """
-        #copy the walkable array from the game map
-        cost = np.array(self.entity.game_map.tiles["walkable"], dtype=np.int8)
-
-        for entity in self.entity.game_map.entities:
-            # chek that an entity blocks movement and the cost isnt zero
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                # add to the cost of the blocked position
-                # a lower number means more enemies will crowd behind each other in hallways.
-                # a higher number means they will take longer paths in order to surround player
-                cost[entity.x, entity.y] += 10
-
-        # create a graph from the cost array and pass the graph to a new pathfinder
-        graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
-        pathfinder = tcod.path.Pathfinder(graph)
+        pathfinder = self.engine.get_player_pathfinder()
 
-        pathfinder.add_root((self.entity.x, self.entity.y)) # add start position
+        # the path leads from this entity down to the player, so remove the starting point
+        path: List[List[int]] = pathfinder.path_from((self.entity.x, self.entity.y))[1:].tolist()
 
-        # compute the path to the destination and remove the starting point
-        path: List[List[int]] = pathfinder.path_to((dest_x, dest_y))[1:].tolist()
-
-        # convert from List[List[int]] to List[Tuple[int]]
         return [(index[0], index[1]) for index in path]
 
 class HostileEnemy(BaseAI):
+    __slots__ = ("path",)
+
     def __init__(self, entity: Actor):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
 
+    def clone(self, entity: Actor) -> HostileEnemy:
+        clone = super().clone(entity)
+        clone.path = list(self.path)
+        return clone
+
+    def translate(self, dx: int, dy: int) -> None:
+        self.path = [(x + dx, y + dy) for x, y in self.path]
+
     def perform(self) -> None:
         target = self.engine.player
         dx = target.x - self.entity.x
@@ -60,7 +63,7 @@ class HostileEnemy(BaseAI):
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
 
-            self.path = self.get_path_to(target.x, target.y)
+            self.path = self.get_path_to_player()
 
         if self.path:
             dest_x, dest_y = self.path.pop(0)
@@ -76,6 +79,7 @@ class ConfusedEnemy(BaseAI):
     back to its previous AI. if an actor occupies the tile the enemy randomly moves to, it will
     attack
     """
+    __slots__ = ("previous_ai", "turns_remaining")
 
     def __init__(
             self, entity: Actor, previous_ai: Optional[BaseAI], turns_remaining: int
@@ -84,6 +88,16 @@ class ConfusedEnemy(BaseAI):
         self.previous_ai = previous_ai
         self.turns_remaining = turns_remaining
 
+    def clone(self, entity: Actor) -> ConfusedEnemy:
+        clone = super().clone(entity)
+        if self.previous_ai:
+            clone.previous_ai = self.previous_ai.clone(entity)
+        return clone
+
+    def translate(self, dx: int, dy: int) -> None:
+        if self.previous_ai:
+            self.previous_ai.translate(dx, dy)
+
     def perform(self) -> None:
         # revert to previous ai if the effect has run out of turns
         if self.turns_remaining <=0:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import copy
+from typing import TYPE_CHECKING, TypeVar
 
 from game_map import GameMap
 
@@ -8,9 +9,20 @@ if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
 
+C = TypeVar("C", bound="BaseComponent")
+
 class BaseComponent:
+    __slots__ = ("parent",)
+
     parent: Entity # owning entity instance
 
+    def clone(self: C) -> C:
+        """
+        return a copy of this component, sharing its immutable data
+        the owner of the clone must set its parent
+        """
+        return copy.copy(self)
+
     @property
     def game_map(self) -> GameMap:
         return self.parent.game_map
@@ -14,6 +14,8 @@ if TYPE_CHECKING:
     from entity import Actor, Item
 
 class Consumable(BaseComponent):
+    __slots__ = ()
+
     parent: Item
 
     def get_action(self, consumer: Actor) -> Optional[ActionOrHandler]:
@@ -32,8 +34,11 @@ class Consumable(BaseComponent):
         inventory = entity.parent
         if isinstance(inventory, components.inventory.Inventory):
             inventory.items.remove(entity)
+            inventory.parent.mark_changed()
 
 class HealingConsumable(Consumable):
+    __slots__ = ("amount",)
+
     def __init__(self, amount: int):
         self.amount = amount
 
@@ -52,6 +57,8 @@ class HealingConsumable(Consumable):
             raise Impossible("Your health is already full")
 
 class LightningDamageConsumable(Consumable):
+    __slots__ = ("damage", "maximum_range")
+
     def __init__(self, damage: int, maximum_range: int):
         self.damage = damage
         self.maximum_range = maximum_range
@@ -61,8 +68,8 @@ class LightningDamageConsumable(Consumable):
         target = None
         closest_distance = self.maximum_range + 1.0
 
-        for actor in self.engine.game_map.actors:
-            if actor is not consumer and self.parent.game_map.visible[actor.x, actor.y]:
+        for actor in self.engine.game_map.get_visible_actors():
+            if actor is not consumer:
                 distance = consumer.distance(actor.x, actor.y)
 
                 if distance < closest_distance:
@@ -79,6 +86,8 @@ class LightningDamageConsumable(Consumable):
             raise Impossible("No enemy is close enough to strike")
 
 class ConfusionConsumable(Consumable):
+    __slots__ = ("number_of_turns",)
+
     def __init__(self, number_of_turns: int):
         self.number_of_turns = number_of_turns
 
@@ -109,9 +118,12 @@ class ConfusionConsumable(Consumable):
         target.ai = components.ai.ConfusedEnemy(
            entity=target, previous_ai=target.ai, turns_remaining=self.number_of_turns
         )
+        target.mark_changed()
         self.consume()
 
 class FireballDamageConsumable(Consumable):
+    __slots__ = ("damage", "radius")
+
     def __init__(self, damage: int, radius: int):
         self.damage = damage
         self.radius = radius
@@ -132,15 +144,13 @@ class FireballDamageConsumable(Consumable):
         if not self.engine.game_map.visible[action.target_xy]:
             raise Impossible("You cannot target an area you cannot see")
 
-        target_hit = False
-        for actor in self.engine.game_map.actors:
-            if actor.distance(*target_xy) <= self.radius:
-                self.engine.message_log.add_message(
-                    f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage"
-                )
-                actor.fighter.take_damage(self.damage)
-                target_hit = True
-
-        if not target_hit:
+        targets = self.engine.game_map.get_actors_within(*target_xy, self.radius)
+        if not targets:
             raise Impossible("There are no targets in the radius")
+
+        for actor in targets:
+            self.engine.message_log.add_message(
+                f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage"
+            )
+        self.engine.game_map.damage_actors(targets, self.damage)
         self.consume()
\ No newline at end of file
@@ -9,6 +9,8 @@ if TYPE_CHECKING:
     from entity import Actor, Item
 
 class Equipment(BaseComponent):
+    __slots__ = ("weapon", "armor")
+
     parent: Actor
 
     def __init__(self, weapon: Optional[Item] = None, armor: Optional[Item] = None):
@@ -51,6 +53,7 @@ class Equipment(BaseComponent):
         if current_item is not None:
             self.unequip_from_slot(slot, add_message)
         setattr(self, slot, item)
+        self.parent.fighter.invalidate_stats()
         if add_message:
             self.equip_message(item.name)
 
@@ -59,6 +62,7 @@ class Equipment(BaseComponent):
         if add_message:
             self.unequip_message(current_item.name)
         setattr(self, slot, None)
+        self.parent.fighter.invalidate_stats()
 
     def toggle_equip(self, equippable_item: Item, add_message: bool = True) -> None:
         if (
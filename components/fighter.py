@@ -1,6 +1,7 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Hashable, Optional, Tuple
 
+from actor_store import StoredField, get_slot_state
 import color
 from components.base_component import BaseComponent
 from render_order import RenderOrder
@@ -9,45 +10,109 @@ if TYPE_CHECKING:
     from entity import Actor
 
 class Fighter(BaseComponent):
+    __slots__ = (
+        "_max_hp", "_hp", "_base_defense", "_base_power",
+        "modifiers", "modifier_defense", "modifier_power", "cached_defense", "cached_power",
+    )
+
     parent: Actor
 
+    # views into the actor store of the map, while the parent is attached to one
+    max_hp = StoredField("max_hp", on_parent=True)
+    base_defense = StoredField("base_defense", on_parent=True)
+    base_power = StoredField("base_power", on_parent=True)
+    # hp without the clamping and dying of the hp property
+    current_hp = StoredField("hp", on_parent=True)
+
     def __init__(self, hp: int, base_defense: int, base_power: int):
-        self.max_hp = hp
+        # the parent isnt set yet, so the private slots are written directly
+        self._max_hp = hp
         self._hp = hp
-        self.base_defense = base_defense
-        self.base_power = base_power
+        self._base_defense = base_defense
+        self._base_power = base_power
+
+        # temporary (defense, power) bonuses by source, e.g. status effects or auras
+        self.modifiers: Dict[Hashable, Tuple[int, int]] = {}
+        # running totals of the modifiers, so reading a stat doesnt depend on their number
+        self.modifier_defense = 0
+        self.modifier_power = 0
+        # effective stats, None when they have to be recomputed
+        self.cached_defense: Optional[int] = None
+        self.cached_power: Optional[int] = None
+
+    def __getstate__(self) -> Tuple[None, dict]:
+        """pickle and copy the stored fields by value, from the private slots"""
+        if hasattr(self, "parent") and self.parent.store is not None:
+            self.parent.store.sync(self.parent)
+        return None, get_slot_state(self)
+
+    def clone(self) -> Fighter:
+        clone = super().clone()
+        clone.modifiers = dict(self.modifiers)
+        return clone
 
     @property
     def hp(self) -> int:
-        return self._hp
+        return self.current_hp
 
     @hp.setter
     def hp(self, value: int) -> None:
-        self._hp = max(0, min(value, self.max_hp))
-        if self._hp == 0 and self.parent.ai:
+        self.current_hp = max(0, min(value, self.max_hp))
+        if self.current_hp == 0 and self.parent.ai:
             self.die()
 
     @property
     def defense(self) -> int:
-        return self.base_defense + self.defense_bonus
+        if self.cached_defense is None:
+            self.cached_defense = self.base_defense + self.defense_bonus
+        return self.cached_defense
 
     @property
     def power(self) -> int:
-        return self.base_power + self.power_bonus
+        if self.cached_power is None:
+            self.cached_power = self.base_power + self.power_bonus
+        return self.cached_power
 
     @property
     def defense_bonus(self) -> int:
         if self.parent.equipment:
-            return self.parent.equipment.defense_bonus
+            return self.parent.equipment.defense_bonus + self.modifier_defense
         else:
-            return 0
+            return self.modifier_defense
 
     @property
     def power_bonus(self) -> int:
         if self.parent.equipment:
-            return self.parent.equipment.power_bonus
+            return self.parent.equipment.power_bonus + self.modifier_power
         else:
-            return 0
+            return self.modifier_power
+
+    def invalidate_stats(self) -> None:
+        """
+        recompute defense and power on their next read
+        must be called whenever the base stats, the equipment or the modifiers change
+        """
+        self.cached_defense = None
+        self.cached_power = None
+        self.parent.mark_changed()
+
+    def add_modifier(self, source: Hashable, defense: int = 0, power: int = 0) -> None:
+        """add a temporary bonus (or malus) to the stats, replacing any earlier one from the same source"""
+        self.remove_modifier(source)
+        self.modifiers[source] = (defense, power)
+        self.modifier_defense += defense
+        self.modifier_power += power
+        self.invalidate_stats()
+
+    def remove_modifier(self, source: Hashable) -> None:
+        """remove the bonus of a source, if it has one"""
+        modifier = self.modifiers.pop(source, None)
+        if modifier is None:
+            return
+        defense, power = modifier
+        self.modifier_defense -= defense
+        self.modifier_power -= power
+        self.invalidate_stats()
 
     def heal(self, amount: int) -> int:
         if self.hp == self.max_hp:
@@ -75,12 +140,19 @@ class Fighter(BaseComponent):
             death_message_color = color.enemy_die
             death_message = f"{self.parent.name} is dead!"
 
+        self.become_remains()
+
+        self.engine.message_log.add_message(death_message, death_message_color)
+        self.engine.player.level.add_xp(self.parent.level.xp_given)
+
+    def become_remains(self) -> None:
+        """turn the parent into its remains, without messages or xp, e.g. when restoring a floor"""
+        self.current_hp = 0
         self.parent.char = "%"
         self.parent.color = (191, 0, 0)
         self.parent.blocks_movement = False
         self.parent.ai = None
         self.parent.name = f"Remains of {self.parent.name}"
         self.parent.render_order = RenderOrder.CORPSE
-
-        self.engine.message_log.add_message(death_message, death_message_color)
-        self.engine.player.level.add_xp(self.parent.level.xp_given)
+        self.parent.mark_changed()
+        self.game_map.scheduler.unschedule(self.parent)
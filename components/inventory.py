@@ -6,17 +6,27 @@ if TYPE_CHECKING:
     from entity import Actor, Item
 
 class Inventory(BaseComponent):
+    __slots__ = ("capacity", "items")
+
     parent: Actor
 
     def __init__(self, capacity: int):
         self.capacity = capacity
         self.items: List[Item] = []
 
+    def clone(self) -> Inventory:
+        clone = super().clone()
+        clone.items = [item.clone() for item in self.items]
+        for item in clone.items:
+            item.parent = clone
+        return clone
+
     def drop(self, item: Item) -> None:
         """
         remove an item from the inventory and place it in the game map at the player's current location
         """
         self.items.remove(item)
+        self.parent.mark_changed()
         item.place(self.parent.x, self.parent.y, self.game_map)
 
         self.engine.message_log.add_message(f"You dropped the {item.name}")
\ No newline at end of file
@@ -7,6 +7,8 @@ if TYPE_CHECKING:
     from entity import Actor
 
 class Level(BaseComponent):
+    __slots__ = ("current_level", "current_xp", "level_up_base", "level_up_factor", "xp_given")
+
     parent: Actor
 
     def __init__(
@@ -38,6 +40,7 @@ class Level(BaseComponent):
             return
 
         self.current_xp += xp
+        self.parent.mark_changed()
 
         self.engine.message_log.add_message(f"You gain {xp} xp")
 
@@ -48,6 +51,7 @@ class Level(BaseComponent):
     def increase_level(self) -> None:
         self.current_xp -= self.experience_to_next_level
         self.current_level += 1
+        self.parent.mark_changed()
 
     def increase_max_hp(self, amount: int = 20) -> None:
         self.parent.fighter.max_hp += amount
@@ -57,10 +61,12 @@ class Level(BaseComponent):
 
     def increase_power(self, amount: int = 1) -> None:
         self.parent.fighter.base_power += amount
+        self.parent.fighter.invalidate_stats()
         self.engine.message_log.add_message("You feel stronger")
         self.increase_level()
 
     def increase_defense(self, amount: int = 1) -> None:
         self.parent.fighter.base_defense += amount
+        self.parent.fighter.invalidate_stats()
         self.engine.message_log.add_message("Your feel tougher")
         self.increase_level()
\ No newline at end of file
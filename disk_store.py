@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Dict, List, Optional, Set
+
+class DiskStore:
+    """
+    Files of data the game moved out of memory, e.g. evicted chunks of the overworld
+    Every store has a temporary directory of its own, removed once the store is closed or
+    garbage collected, so the files of different games never mix. The files are part of the
+    saved game, but not of the pickled store: SaveFile saves the files that were written or
+    removed since the last save, and carries the others over from the save file
+    """
+
+    def __init__(self) -> None:
+        self.directory = tempfile.mkdtemp(prefix="rougelike-")
+        self.finalizer = weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+        # names of the files written or removed since the game was last saved
+        self.unsaved: Set[str] = set()
+
+    def __getstate__(self) -> dict:
+        return {}
+
+    def __setstate__(self, state: dict) -> None:
+        # the files are written by SaveFile.load
+        self.__init__()
+
+    def get_path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def get_names(self) -> List[str]:
+        return sorted(os.listdir(self.directory))
+
+    def __contains__(self, name: str) -> bool:
+        return os.path.exists(self.get_path(name))
+
+    def read(self, name: str) -> Optional[bytes]:
+        """return the data of a file, or None if there is no such file"""
+        try:
+            with open(self.get_path(name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, name: str, data: bytes) -> None:
+        with open(self.get_path(name), "wb") as f:
+            f.write(data)
+        self.unsaved.add(name)
+
+    def remove(self, name: str) -> None:
+        try:
+            os.remove(self.get_path(name))
+        except FileNotFoundError:
+            return
+        self.unsaved.add(name)
+
+    def clear(self, extension: str = "") -> None:
+        """remove the files whose name ends with `extension`"""
+        for name in os.listdir(self.directory):
+            if name.endswith(extension):
+                self.remove(name)
+
+    def read_all(self) -> Dict[str, bytes]:
+        return {name: self.read(name) for name in self.get_names()}
+
+    def take_unsaved(self) -> Dict[str, Optional[bytes]]:
+        """return the data of the files changed since the last save, None for removed files, and mark them saved"""
+        files = {name: self.read(name) for name in sorted(self.unsaved)}
+        self.unsaved = set()
+        return files
+
+    def update(self, files: Dict[str, Optional[bytes]]) -> None:
+        """write or remove files as returned by take_unsaved, without marking them unsaved"""
+        for name, data in files.items():
+            if data is None:
+                try:
+                    os.remove(self.get_path(name))
+                except FileNotFoundError:
+                    pass
+            else:
+                with open(self.get_path(name), "wb") as f:
+                    f.write(data)
+
+    def close(self) -> None:
+        """remove the directory with the files"""
+        self.finalizer()
@@ -53,7 +53,8 @@ def get_max_value_for_floor(
 def get_entities_at_random(
         weigthed_chances_by_floor: Dict[int, List[Tuple[Entity, int]]],
         number_of_entities: int,
-        floor: int
+        floor: int,
+        rng: random.Random,
 ) -> List[Entity]:
     entity_weighted_chances = {}
 
@@ -68,7 +69,7 @@ def get_entities_at_random(
     entities = list(entity_weighted_chances.keys())
     entity_weighted_chance_values = list(entity_weighted_chances.values())
 
-    chosen_entities = random.choices(
+    chosen_entities = rng.choices(
         entities, weights=entity_weighted_chance_values, k=number_of_entities
     )
     return chosen_entities
@@ -102,35 +103,38 @@ class RectangularRoom:
         )
 
 def place_entities(
-        room: RectangularRoom, dungeon: DungeonGameMap, floor_number: int
+        room: RectangularRoom, dungeon: DungeonGameMap, floor_number: int, rng: random.Random
 ) -> None:
-    number_of_monsters = random.randint(
+    number_of_monsters = rng.randint(
         0, get_max_value_for_floor(max_monsters_by_floor, floor_number)
     )
-    number_of_items = random.randint(
+    number_of_items = rng.randint(
         0, get_max_value_for_floor(max_items_by_floor, floor_number)
     )
 
     monsters: List[Entity] = get_entities_at_random(
-        enemy_chance, number_of_monsters, floor_number
+        enemy_chance, number_of_monsters, floor_number, rng
     )
     items: List[Entity] = get_entities_at_random(
-        item_chances, number_of_items, floor_number
+        item_chances, number_of_items, floor_number, rng
     )
 
     for entity in monsters + items:
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
-            entity.spawn(dungeon, x, y)
+        x = rng.randint(room.x1 + 1, room.x2 - 1)
+        y = rng.randint(room.y1 + 1, room.y2 - 1)
+        if (
+            not dungeon.get_entities_at_location(x, y)
+            and (x, y) != dungeon.player_start_location
+        ):
+            dungeon.generated_entities.append(entity.spawn(dungeon, x, y))
 
 def tunnel_between(
-        start: Tuple[int, int], end: Tuple[int, int]
+        start: Tuple[int, int], end: Tuple[int, int], rng: random.Random
 ) -> Iterator[Tuple[int, int]]:
     """return an L-shaped tunnel between the 2 points"""
     x1, y1 = start
     x2, y2 = end
-    if random.random() < 0.5: #50% chance
+    if rng.random() < 0.5: #50% chance
         #move horizontally, then vertically
         corner_x, corner_y = x2, y1
     else:
@@ -150,22 +154,28 @@ def generate_dungeon(
         room_max_size: int,
         map_width: int,
         map_height: int,
-        engine: Engine
+        engine: Engine,
+        floor_number: int,
+        rng: random.Random,
+        use_actor_store: bool = True,
 ) -> DungeonGameMap:
-    """generate a new dungeon map"""
-    player = engine.player
-    dungeon = DungeonGameMap(engine, map_width, map_height, entities=[player])
+    """
+    generate a new dungeon map
+    all randomness comes from `rng`, and the player is not touched, so this can run in the
+    background. The player should be placed at the map's player_start_location
+    """
+    dungeon = DungeonGameMap(engine, map_width, map_height, use_actor_store=use_actor_store)
 
     rooms: List[RectangularRoom] = []
 
     center_of_last_room = (0, 0)
 
     for r in range(max_rooms):
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = rng.randint(0, dungeon.width - room_width - 1)
+        y = rng.randint(0, dungeon.height - room_height - 1)
 
         new_room = RectangularRoom(x, y, room_width, room_height)
 
@@ -179,20 +189,22 @@ def generate_dungeon(
 
         if len(rooms) == 0:
             # first room, put player in the middle
-            player.place(*new_room.center, dungeon)
+            dungeon.player_start_location = new_room.center
         else:
             # dig tunnel between previous room and new one
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
+            for x, y in tunnel_between(rooms[-1].center, new_room.center, rng):
                 dungeon.tiles[x, y] = tile_types.floor
 
             center_of_last_room = new_room.center
 
-        place_entities(new_room, dungeon, engine.game_world.current_floor)
+        place_entities(new_room, dungeon, floor_number, rng)
 
         dungeon.tiles[center_of_last_room] = tile_types.down_stairs
         dungeon.downstairs_location = center_of_last_room
 
         rooms.append(new_room)
 
+    # floor records are the changes since, see FloorRecord
+    dungeon.generated_tiles = dungeon.tiles.copy(order="F")
     return dungeon
 
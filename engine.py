@@ -1,49 +1,153 @@
 from __future__ import annotations
-import lzma
-import pickle
-from typing import TYPE_CHECKING, Any, Iterable
+import time
+from typing import TYPE_CHECKING, Any, Iterable, Optional
 
 from tcod import Console
 from tcod.map import compute_fov
+import tcod.path
 
 import exceptions
 from camera import Camera
+from disk_store import DiskStore
 from message_log import MessageLog
 import render_functions
 from sound_manager import SoundManager
+import tile_types
+from turn_scheduler import TURN_LENGTH
 
 if TYPE_CHECKING:
     from entity import Actor
     from game_map import GameMap, GameWorld
+    from save_file import SaveFile
 
 class Engine:
     game_map: GameMap
     game_world: GameWorld
     sound_manager: SoundManager
 
-    def __init__(self, player: Actor, camera: Camera):
+    # attributes that only last for a session, they are left out of saves and set up again by
+    # init_runtime when loading. The camera and sound manager are set by whoever loads the engine
+    RUNTIME_ATTRIBUTES = (
+        "sound_manager",
+        "camera",
+        "mouse_location",
+        "player_pathfinder",
+        "save_file",
+        "autosave_filename",
+        "turns_since_autosave",
+        "session_start",
+    )
+
+    def __init__(self, player: Actor, camera: Camera, activity_radius: int = 30):
         self.message_log = MessageLog()
-        self.mouse_location = (0, 0)
         self.player = player
+        # actors further away from the player than this are put to sleep
+        self.activity_radius = activity_radius
+        self.autosave_interval = 20
+        # seconds played before the current session, see get_playtime
+        self.playtime = 0.0
+        # data moved out of memory, saved along with the engine
+        self.disk_store = DiskStore()
+        self.init_runtime()
         self.camera = camera
 
+    def __getstate__(self) -> dict:
+        state = {
+            name: value for name, value in self.__dict__.items() if name not in self.RUNTIME_ATTRIBUTES
+        }
+        state["playtime"] = self.get_playtime()
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.init_runtime()
+
+    def init_runtime(self) -> None:
+        self.mouse_location = (0, 0)
+        self.player_pathfinder: Optional[tcod.path.Pathfinder] = None
+        # the file this engine was last saved to or loaded from, saves to it only append changes
+        self.save_file: Optional[SaveFile] = None
+        # the save slot, saved to in the background every `autosave_interval` turns and on every new floor
+        self.autosave_filename = "savegame.sav"
+        self.turns_since_autosave = 0
+        self.session_start = time.monotonic()
+
+    def get_playtime(self) -> float:
+        """return the seconds played in total"""
+        return self.playtime + time.monotonic() - self.session_start
+
     def handle_enemy_turns(self) -> None:
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
+        # paths to the player are only valid for the turn they were computed in
+        self.player_pathfinder = None
+        scheduler = self.game_map.scheduler
+        # time passes for as long as the player's action took, then every actor that is due acts
+        scheduler.advance(scheduler.action_delay(self.player))
+        scheduler.wake_near(self.player.x, self.player.y, self.activity_radius)
+        entity = scheduler.next_actor()
+        while entity:
+            if (
+                max(abs(entity.x - self.player.x), abs(entity.y - self.player.y))
+                > self.activity_radius
+                and not scheduler.is_alerted(entity)
+            ):
+                # too far away to matter, sleep until the player comes close or makes noise
+                scheduler.sleep(entity)
+            elif entity.ai:
                 try:
                     entity.ai.perform()
                 except exceptions.Impossible:
                     pass # ignore impossible exceptions from enemy actions
+                # the state of its AI changes whenever an actor acts
+                entity.mark_changed()
+            entity = scheduler.next_actor()
+        self.player_pathfinder = None
+
+    def make_noise(self, x: int, y: int, radius: int, turns: int = 10) -> None:
+        """wake up sleeping actors that can hear a noise, and keep them awake for a number of turns"""
+        self.game_map.scheduler.wake_near(x, y, radius, alert_duration=turns * TURN_LENGTH)
+
+    def get_player_pathfinder(self) -> tcod.path.Pathfinder:
+        """
+        return a pathfinder rooted at the player, shared by every AI during the current turn
+        it is created by the first request of a turn, and only resolves as far as AIs ask for
+        """
+        if self.player_pathfinder is None:
+            cost = self.game_map.get_path_cost()
+            graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
+            self.player_pathfinder = tcod.path.Pathfinder(graph)
+            self.player_pathfinder.add_root((self.player.x, self.player.y))
+        return self.player_pathfinder
 
     def update_fov(self) -> None:
-        """recomputes the visible area based on the players point of view"""
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
-            (self.player.x, self.player.y),
-            radius=8
+        """
+        recomputes the visible area based on the players point of view
+        nothing is done if neither the point of view nor the tiles changed since the last call.
+        Only the box around the radius is computed, nothing outside of it can be visible
+        """
+        radius = 8
+        game_map = self.game_map
+        x, y = self.player.x, self.player.y
+        fov_key = (x, y, radius, game_map.tiles_version)
+        if game_map.fov_key == fov_key:
+            return
+        game_map.fov_key = fov_key
+
+        # only tiles around the previous and the new point of view can change appearance
+        if game_map.fov_region:
+            game_map.visible[game_map.fov_region] = False
+            game_map.mark_dirty(game_map.fov_region)
+        region = game_map.fov_region = (
+            slice(max(0, x - radius), x + radius + 1),
+            slice(max(0, y - radius), y + radius + 1),
+        )
+        game_map.visible[region] = compute_fov(
+            tile_types.palette["transparent"][game_map.tiles[region]],
+            (x - region[0].start, y - region[1].start),
+            radius=radius
         )
         # if a tile is visible, it should be added to explored
-        self.game_map.explored |= self.game_map.visible
+        game_map.explored[region] |= game_map.visible[region]
+        game_map.mark_dirty(region)
 
     def render(self, console: Console) -> None:
         self.camera.update(self.player)
@@ -79,9 +183,35 @@ class Engine:
 
 
     def save_as(self, filename: str) -> None:
-        """save this engine instance as a compressed file"""
-        self.sound_manager.pauseBgm()
-        self.sound_manager.clearSfxCache()
-        save_data = lzma.compress(pickle.dumps(self))
-        with open(filename, "wb") as f:
-            f.write(save_data)
\ No newline at end of file
+        """
+        save this engine instance to a file
+        saving again to the same file only appends what changed, see SaveFile
+        """
+        self.open_save_file(filename).save(self)
+
+    def autosave(self) -> None:
+        """save to the autosave file without waiting for it to be written"""
+        self.turns_since_autosave = 0
+        self.open_save_file(self.autosave_filename).save(self, wait=False)
+
+    def autosave_if_due(self) -> None:
+        """called at the end of every turn"""
+        if not self.player.is_alive:
+            return
+        self.turns_since_autosave += 1
+        if (
+            self.turns_since_autosave >= self.autosave_interval
+            or self.save_file is None
+            or self.save_file.game_map is not self.game_map
+        ):
+            self.autosave()
+
+    def open_save_file(self, filename: str) -> SaveFile:
+        from save_file import SaveFile
+
+        if self.save_file is None or self.save_file.filename != filename:
+            if self.save_file is not None:
+                # writes to the previous file finish before any to the new one
+                self.save_file.wait()
+            self.save_file = SaveFile(filename)
+        return self.save_file
\ No newline at end of file
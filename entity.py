@@ -4,6 +4,7 @@ import math
 from typing import Tuple, TypeVar, TYPE_CHECKING, Optional, Type, Union
 
 
+from actor_store import StoredField, get_slot_state
 from render_order import RenderOrder
 
 import copy
@@ -17,6 +18,7 @@ if TYPE_CHECKING:
     from components.inventory import Inventory
     from components.equippable import Equippable
     from components.level import Level
+    from actor_store import ActorStore
     from game_map import GameMap
 
 T = TypeVar("T", bound="Entity")
@@ -24,8 +26,13 @@ T = TypeVar("T", bound="Entity")
 class Entity:
     """
     Generic object representing any entity within game
+    Subclasses hold x and y: items in slots of their own, actors in the actor store of their map
     """
+    __slots__ = ("parent", "char", "color", "name", "blocks_movement", "render_order")
+
     parent: Union[GameMap, Inventory]
+    x: int
+    y: int
     def __init__(
             self,
             parent: Optional[GameMap] = None,
@@ -47,35 +54,66 @@ class Entity:
         if parent:
             # if parent isnt provided, it will get set later
             self.parent = parent
-            parent.entities.add(self)
+            parent.add_entity(self)
+
+    def __getstate__(self) -> Tuple[None, dict]:
+        return None, get_slot_state(self)
 
     @property
     def game_map(self) -> GameMap:
         return self.parent.game_map
 
+    def mark_changed(self) -> None:
+        """
+        flag that the state of this entity changed since the game was last saved, see SaveFile
+        entities that aren't on a map yet are saved in full once they are added to one
+        """
+        owner = getattr(self, "parent", None)
+        if owner is not None and not hasattr(owner, "changed_entities"):
+            # an inventory, the item is saved along with the map of the actor carrying it
+            owner = getattr(owner.parent, "parent", None)
+        if owner is not None:
+            owner.changed_entities.add(self)
+
+    def clone(self: T) -> T:
+        """
+        return a copy of this entity that isnt on any map
+        immutable data like the name and color is shared, components are cloned
+        """
+        clone = copy.copy(self)
+        if hasattr(clone, "parent"):
+            del clone.parent
+        return clone
+
     def spawn(self: T, game_map: GameMap, x: int, y: int) -> T:
         """spawn a copy of this instance at the given location"""
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         clone.x = x
         clone.y = y
         clone.parent = game_map
-        game_map.entities.add(clone)
+        game_map.add_entity(clone)
         return clone
 
     def place(self, x: int, y: int, game_map: Optional[GameMap] = None) -> None:
         """place this entity at a new location. Handles moving across game maps"""
-        self.x = x
-        self.y = y
         if game_map:
             if hasattr(self, "parent"):
                 if self.parent is self.game_map:
-                    self.game_map.entities.remove(self)
+                    self.game_map.remove_entity(self)
+            # the entity may already be on the new map, e.g. when it was passed to its constructor
+            game_map.remove_entity(self)
+            self.x = x
+            self.y = y
             self.parent = game_map
-            game_map.entities.add(self)
+            game_map.add_entity(self)
+        elif hasattr(self, "parent") and self.parent is self.game_map:
+            self.game_map.move_entity(self, x, y)
+        else:
+            self.x = x
+            self.y = y
 
     def move(self, dx: int, dy: int) -> None:
-        self.x += dx
-        self.y += dy
+        self.place(self.x + dx, self.y + dy)
 
     def distance(self, x: int, y: int) -> float:
         """
@@ -84,6 +122,15 @@ class Entity:
         return math.sqrt((x - self.x) ** 2 + (y - self.y) ** 2)
 
 class Actor(Entity):
+    __slots__ = (
+        "ai", "fighter", "equipment", "inventory", "level", "observing", "speed",
+        "_x", "_y", "store", "store_index",
+    )
+
+    # views into the actor store of the map, while the actor is attached to one
+    x = StoredField("x")
+    y = StoredField("y")
+
     def __init__(
             self,
             *,
@@ -97,7 +144,10 @@ class Actor(Entity):
             fighter: Fighter,
             inventory: Inventory,
             level: Level,
+            speed: int = 100,
     ):
+        self.store: Optional[ActorStore] = None
+        self.store_index: Optional[int] = None
         super().__init__(
             x=x,
             y=y,
@@ -123,6 +173,48 @@ class Actor(Entity):
 
         self.observing = self
 
+        # actions per turn relative to normal speed (100), used by the map's turn scheduler
+        self.speed = speed
+
+    def __getstate__(self) -> Tuple[None, dict]:
+        """
+        pickle and copy the stored fields by value, from the private slots
+        restoring x and y instead would write to a store that may not be unpickled yet
+        """
+        if self.store is not None:
+            self.store.sync(self)
+        return None, get_slot_state(self)
+
+    def clone(self) -> Actor:
+        clone = super().clone()
+        # the clone starts out detached, with the values copied from the store
+        clone.store, clone.store_index = None, None
+
+        clone.fighter = self.fighter.clone()
+        clone.fighter.parent = clone
+
+        clone.inventory = self.inventory.clone()
+        clone.inventory.parent = clone
+
+        clone.level = self.level.clone()
+        clone.level.parent = clone
+
+        # equipped items are in the inventory as well, and must stay the same objects
+        cloned_items = {
+            id(item): cloned_item for item, cloned_item in zip(self.inventory.items, clone.inventory.items)
+        }
+        clone.equipment = self.equipment.clone()
+        clone.equipment.parent = clone
+        for slot in ("weapon", "armor"):
+            item = getattr(self.equipment, slot)
+            if item is not None:
+                setattr(clone.equipment, slot, cloned_items.get(id(item)) or item.clone())
+
+        clone.ai = self.ai.clone(clone) if self.ai else None
+        if self.observing is self:
+            clone.observing = clone
+        return clone
+
     @property
     def is_alive(self) -> bool:
         """returns true as long as actor can perform actions"""
@@ -130,6 +222,8 @@ class Actor(Entity):
 
 
 class Item(Entity):
+    __slots__ = ("x", "y", "consumable", "equippable")
+
     def __init__(
             self,
             *,
@@ -157,4 +251,16 @@ class Item(Entity):
 
         self.equippable = equippable
         if self.equippable:
-            self.equippable.parent = self
\ No newline at end of file
+            self.equippable.parent = self
+
+    def clone(self) -> Item:
+        clone = super().clone()
+
+        if self.consumable:
+            clone.consumable = self.consumable.clone()
+            clone.consumable.parent = clone
+
+        if self.equippable:
+            clone.equippable = self.equippable.clone()
+            clone.equippable.parent = clone
+        return clone
@@ -1,28 +1,45 @@
 from __future__ import annotations
 
-from typing import Iterable, TYPE_CHECKING, Optional, Iterator, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import lzma
+import pickle
+import random
+import traceback
+from typing import Iterable, TYPE_CHECKING, Optional, Iterator, Tuple, List, Dict, Set
 import numpy as np
 from tcod import Console
 
+from actor_store import ActorStore
+from bit_mask import BitMask
 from camera import Camera
 from entity import Actor, Item
 import tile_types
+from turn_scheduler import TurnScheduler
 
 if TYPE_CHECKING:
+    from disk_store import DiskStore
     from engine import Engine
     from entity import Entity
 
 class Chunk:
+    """
+    A square area of the overworld. While the chunk is outside of the map window, it holds the
+    tiles and entities of its area, with entities in world coordinates
+    """
     def __init__(
-            self, engine: Engine, chunk_x: int, chunk_y: int, entities: Iterable[Entity] = ()
+            self,
+            chunk_x: int,
+            chunk_y: int,
+            tiles: np.ndarray,
+            explored: BitMask,
+            entities: Iterable[Entity] = ()
     ):
-        self.size = 20
-        self.visible = []
-        self.explored = []
-        self.tiles = []
+        self.size = tiles.shape[0]
+        self.explored = explored
+        self.tiles = tiles
         self.chunk_x, self.chunk_y = chunk_x, chunk_y
 
-        self.engine = engine
         self.entities = set(entities)
 
     def coords_in_chunk(self, entity: Entity) -> Tuple[int, int]:
@@ -31,22 +48,149 @@ class Chunk:
     def distance_from_entity(self, entity: Entity) -> Tuple[int, int]:
         return abs(self.size*self.chunk_x - entity.x), abs(self.size*self.chunk_y - entity.y)
 
+class ChunkStore:
+    """compressed storage for chunks that were evicted from memory, in the disk store of the game"""
+
+    def __init__(self, disk_store: DiskStore):
+        self.disk_store = disk_store
+
+    @staticmethod
+    def get_name(coordinates: Tuple[int, int]) -> str:
+        return "{}_{}.chunk".format(*coordinates)
+
+    def save(self, chunk: Chunk) -> None:
+        self.disk_store.write(self.get_name((chunk.chunk_x, chunk.chunk_y)), lzma.compress(pickle.dumps(chunk)))
+
+    def load(self, coordinates: Tuple[int, int]) -> Optional[Chunk]:
+        """return the stored chunk at the given chunk coordinates, or None if it was never stored"""
+        data = self.disk_store.read(self.get_name(coordinates))
+        return None if data is None else pickle.loads(lzma.decompress(data))
+
 class GameMap:
     def __init__(
-            self, engine: Engine, width: int, height: int, entities: Iterable[Entity] = ()
+            self,
+            engine: Engine,
+            width: int,
+            height: int,
+            entities: Iterable[Entity] = (),
+            use_actor_store: bool = True,
     ):
         self.visible = []
         self.explored = []
         self.tiles = []
 
+        # composed light/dark/shroud graphics of the part of the map in view, only recomposed
+        # where marked dirty, or entirely when the view moves
+        self.rendered_tiles = []
+        self.rendered_view: Optional[Tuple[slice, slice]] = None
+        self.dirty_regions: List[Tuple[slice, slice]] = [(slice(None), slice(None))]
+        self.fov_region: Optional[Tuple[slice, slice]] = None
+        # bumped whenever tiles change after generation, so results computed from them are redone
+        self.tiles_version = 0
+        # full map arrays of tile fields by name, with the tiles version they were looked up for
+        self.tile_fields: Dict[str, Tuple[int, np.ndarray]] = {}
+        # the (x, y, radius, tiles version) the visible array was last computed for
+        self.fov_key: Optional[Tuple[int, int, int, int]] = None
+        # what changed since the map was last saved, so saves only write that, see SaveFile
+        self.changed_entities: Set[Entity] = set()
+        self.unsaved_regions: List[Tuple[slice, slice]] = [(slice(None), slice(None))]
+
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
+        self.entities = set()
+        self.scheduler = TurnScheduler()
+        # spatial index of the entities on each tile, kept up to date by add/remove/move_entity
+        self.entity_locations: Dict[Tuple[int, int], List[Entity]] = {}
+        # positions and combat stats of the actors on this map as arrays, for vectorized queries
+        self.actor_store: Optional[ActorStore] = ActorStore() if use_actor_store else None
+        for entity in entities:
+            self.add_entity(entity)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # cached lookups and the composed graphics are cheap to redo and not worth saving
+        state["tile_fields"] = {}
+        state["rendered_tiles"] = []
+        state["rendered_view"] = None
+        state["dirty_regions"] = [(slice(None), slice(None))]
+        # rebuilt by rebuild_indexes once the entities are loaded
+        state["entity_locations"] = {}
+        # a loaded map is as saved
+        state["changed_entities"] = set()
+        state["unsaved_regions"] = []
+        return state
+
+    def rebuild_indexes(self) -> None:
+        """rebuild the spatial index of the entities and the rows of the actor store, after loading"""
+        self.entity_locations = {}
+        for entity in self.entities:
+            self.entity_locations.setdefault((entity.x, entity.y), []).append(entity)
+        if self.actor_store is not None:
+            self.actor_store.rebuild_rows(self.entities)
 
     @property
     def game_map(self) -> GameMap:
         return self
 
+    def get_tile_field(self, field: str) -> np.ndarray:
+        """
+        return one field of every tile of the map, e.g. "walkable", looked up in the tile palette
+        the array is cached until the tiles change, and must not be modified
+        """
+        cached = self.tile_fields.get(field)
+        if cached is None or cached[0] != self.tiles_version:
+            cached = self.tile_fields[field] = (self.tiles_version, tile_types.palette[field][self.tiles])
+        return cached[1]
+
+    def get_tile(self, x: int, y: int) -> np.ndarray:
+        """return the tile record at a location, with its walkable, transparent, dark and light fields"""
+        return tile_types.palette[self.tiles[x, y]]
+
+    def add_entity(self, entity: Entity) -> None:
+        """add an entity to this map at its current location"""
+        if entity in self.entities:
+            return
+        self.entities.add(entity)
+        self.changed_entities.add(entity)
+        self.entity_locations.setdefault((entity.x, entity.y), []).append(entity)
+        if isinstance(entity, Actor):
+            if self.actor_store is not None:
+                self.actor_store.attach(entity)
+            if entity.is_alive and entity is not self.engine.player:
+                self.scheduler.schedule(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        """remove an entity from this map, if it is on it"""
+        if entity not in self.entities:
+            return
+        self.entities.remove(entity)
+        self.changed_entities.add(entity)
+        self.scheduler.unschedule(entity)
+        self.unindex_entity(entity)
+        if self.actor_store is not None and isinstance(entity, Actor):
+            self.actor_store.detach(entity)
+
+    def unindex_entity(self, entity: Entity) -> None:
+        location = (entity.x, entity.y)
+        entities_at_location = self.entity_locations[location]
+        entities_at_location.remove(entity)
+        if not entities_at_location:
+            del self.entity_locations[location]
+
+    def move_entity(self, entity: Entity, x: int, y: int) -> None:
+        """
+        move an entity on this map to a new location
+        only the spatial index changes, the entity keeps its turn and its row in the actor store
+        """
+        self.unindex_entity(entity)
+        entity.x, entity.y = x, y
+        self.changed_entities.add(entity)
+        self.entity_locations.setdefault((x, y), []).append(entity)
+
+    def get_entities_at_location(self, x: int, y: int) -> List[Entity]:
+        """return the entities at the given location. The list must not be modified"""
+        return self.entity_locations.get((x, y), [])
+
     @property
     def actors(self) -> Iterable[Actor]:
         """iterate over this maps living actors"""
@@ -60,56 +204,130 @@ class GameMap:
     def items(self) -> Iterator[Item]:
         yield from (entity for entity in self.entities if isinstance(entity, Item))
 
+    def get_actors_within(self, x: int, y: int, radius: float) -> List[Actor]:
+        """return the living actors whose distance to x, y is at most `radius`"""
+        if self.actor_store is not None:
+            return self.actor_store.get_actors_within(x, y, radius)
+        return [actor for actor in self.actors if actor.distance(x, y) <= radius]
+
+    def get_visible_actors(self) -> List[Actor]:
+        """return the living actors on visible tiles"""
+        if self.actor_store is not None:
+            return self.actor_store.get_actors_in(self.visible)
+        return [actor for actor in self.actors if self.visible[actor.x, actor.y]]
+
+    def damage_actors(self, actors: List[Actor], amount: int) -> None:
+        """apply the same damage to several actors on this map"""
+        if self.actor_store is not None:
+            self.actor_store.apply_damage(actors, amount)
+        else:
+            for actor in actors:
+                actor.fighter.take_damage(amount)
+
     def get_blocking_entity_at_location(
             self, location_x: int, location_y: int
     ) -> Optional[Entity]:
-        for entity in self.entities:
-            if (
-                    entity.blocks_movement
-                    and entity.x == location_x
-                    and entity.y == location_y
-            ):
+        for entity in self.get_entities_at_location(location_x, location_y):
+            if entity.blocks_movement:
                 return entity
 
         return None
 
     def get_actor_at_location(self, x: int, y: int):
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+        for entity in self.get_entities_at_location(x, y):
+            if isinstance(entity, Actor) and entity.is_alive:
+                return entity
+
+    def get_path_cost(self) -> np.ndarray:
+        """return a pathfinding cost array of this map, where blocking entities are costly"""
+        #copy the walkable array from the game map
+        cost = np.array(self.get_tile_field("walkable"), dtype=np.int8)
+
+        for entity in self.entities:
+            # chek that an entity blocks movement and the cost isnt zero
+            if entity.blocks_movement and cost[entity.x, entity.y]:
+                # add to the cost of the blocked position
+                # a lower number means more enemies will crowd behind each other in hallways.
+                # a higher number means they will take longer paths in order to surround player
+                cost[entity.x, entity.y] += 10
+
+        return cost
 
     def in_bounds(self, x: int, y: int) -> bool:
         """Return True if x and y are inside of the bounds of this map"""
         return 0 <= x < self.width and 0 <= y < self.height
 
-    def render(self, console: Console, camera: Camera) -> None:
+    def get_world_location(self, x: int, y: int) -> Tuple[int, int]:
+        """return the world coordinates of a location on this map"""
+        return x, y
+
+    def follow(self, entity: Entity) -> None:
         """
-        renders the map
+        keep the area around an entity loaded, called after the player acts
+        maps that are held in memory entirely have nothing to do
+        """
+
+    def mark_dirty(self, region: Optional[Tuple[slice, slice]] = None) -> None:
+        """
+        flag a 2d area of the map as needing to be recomposed on the next render
+        must be called whenever tiles, visible or explored are changed after the map is shown
+        defaults to the entire map
+        """
+        if region is None:
+            region = (slice(None), slice(None))
+        self.dirty_regions.append(region)
+        self.unsaved_regions.append(region)
+
+    def mark_tiles_changed(self, region: Optional[Tuple[slice, slice]] = None) -> None:
+        """
+        flag that tiles were changed after generation, invalidating the field of view and
+        the cached tile fields
+        """
+        self.tiles_version += 1
+        self.mark_dirty(region)
+
+    def update_rendered_tiles(self, view: Tuple[slice, slice]) -> None:
+        """
+        recompose the rendered tiles of the part of the map in `view`, where it is dirty
         If a tile is in the visible array, draw it with its "light" colors
         If it isn't, but it's in the explored array, draw it with its "dark" colors
         Default to SHROUD, meaning its not visible AND not explored
         """
+        view_x, view_y = view[0].indices(self.width), view[1].indices(self.height)
+        if view != self.rendered_view:
+            shape = (view_x[1] - view_x[0], view_y[1] - view_y[0])
+            if np.shape(self.rendered_tiles) != shape:
+                self.rendered_tiles = np.full(shape, fill_value=tile_types.SHROUD, order="F")
+            self.rendered_view = view
+            self.dirty_regions = [(slice(None), slice(None))]
+
+        for region in self.dirty_regions:
+            # the dirty region clipped to the view
+            x1, x2, _ = region[0].indices(self.width)
+            y1, y2, _ = region[1].indices(self.height)
+            x1, x2 = max(x1, view_x[0]), min(x2, view_x[1])
+            y1, y2 = max(y1, view_y[0]), min(y2, view_y[1])
+            if x1 >= x2 or y1 >= y2:
+                continue
+            region = slice(x1, x2), slice(y1, y2)
+            window = self.rendered_tiles[x1 - view_x[0]:x2 - view_x[0], y1 - view_y[0]:y2 - view_y[0]]
+            tiles = tile_types.palette[self.tiles[region]]
+            window[...] = tile_types.SHROUD
+            np.copyto(window, tiles["dark"], where=self.explored[region])
+            np.copyto(window, tiles["light"], where=self.visible[region])
+        self.dirty_regions.clear()
 
-        console.tiles_rgb[0 : camera.width, 0 : camera.height] = np.full(
-            (camera.width, camera.height), fill_value=tile_types.SHROUD2, order="F"
-        )
-
-        to_print = np.select(
-            condlist=[self.visible, self.explored],
-            choicelist=[self.tiles["light"], self.tiles["dark"]],
-            default=tile_types.SHROUD
-        )
-
-        for y in range(self.height):
-            for x in range(self.width):
-                x_in_camera, y_in_camera = camera.apply(x, y)
-                if camera.in_bounds(x_in_camera, y_in_camera) and self.in_bounds(x, y):
-                    console.tiles_rgb[x_in_camera, y_in_camera] = to_print[x][y]
+    def render(self, console: Console, camera: Camera) -> None:
+        """
+        renders the map
+        the tiles are blitted from the rendered tiles of the part of the map the camera can see
+        """
+        # clipped at the map edges
+        screen_view, map_view = camera.get_views(self.width, self.height)
+        self.update_rendered_tiles(map_view)
 
-        # np.roll(to_print, camera.y, axis=0)
-        # np.roll(to_print, camera.x, axis=1)
-        #
-        # console.tiles_rgb[0 : self.width, 0 : self.height] = to_print
+        console.tiles_rgb[0 : camera.width, 0 : camera.height] = tile_types.SHROUD2
+        console.tiles_rgb[screen_view] = self.rendered_tiles
 
         entities_sorted_for_rendering = sorted(
             self.entities, key=lambda x: x.render_order.value
@@ -124,49 +342,275 @@ class GameMap:
 
 class DungeonGameMap(GameMap):
     def __init__(
-            self, engine: Engine, width: int, height: int, entities: Iterable[Entity] = ()
+            self,
+            engine: Engine,
+            width: int,
+            height: int,
+            entities: Iterable[Entity] = (),
+            use_actor_store: bool = True,
     ):
-        super().__init__(engine, width, height, entities)
-        self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
+        super().__init__(engine, width, height, entities, use_actor_store)
+        self.tiles = np.full(
+            (width, height), fill_value=tile_types.wall, dtype=tile_types.tile_id_dt, order="F"
+        )
 
-        self.visible = np.full(
-            (width, height), fill_value=False, order="F"
-        ) # tiles player can currently see
-        self.explored = np.full(
-            (width, height), fill_value=False, order="F"
-        ) # tiles player has seen before
+        self.visible = BitMask((width, height), fill_value=False) # tiles player can currently see
+        self.explored = BitMask((width, height), fill_value=False) # tiles player has seen before
 
         self.downstairs_location = (0, 0)
+        self.player_start_location = (0, 0)
+        # entities placed by procgen, in the order they were generated, and the tiles it generated
+        self.generated_entities: List[Entity] = []
+        self.generated_tiles: Optional[np.ndarray] = None
 
 class WorldGameMap(DungeonGameMap):
+    """
+    An endless overworld, streamed in chunks that are generated from a seed
+    Only a window of width x height tiles is held in the map arrays, and the coordinates of the
+    entities on the map are relative to the window. When the followed entity crosses into
+    another chunk the window is recentered around it. Chunks that leave the window are kept
+    in a LRU of resident chunks, and evicted to the chunk store when it is full
+    """
     def __init__(
-            self, engine: Engine, width: int, height: int, entities: Iterable[Entity] = ()
+            self,
+            engine: Engine,
+            width: int,
+            height: int,
+            entities: Iterable[Entity] = (),
+            seed: int = 1,
+            chunk_size: int = 20,
+            max_resident_chunks: int = 49,
+            use_actor_store: bool = True,
     ):
-        super().__init__(engine, width, height, entities)
-        self.tiles = np.full((width, height), fill_value=tile_types.water, order="F")
+        super().__init__(engine, width, height, entities, use_actor_store)
+        self.tiles = np.full(
+            (width, height), fill_value=tile_types.water, dtype=tile_types.tile_id_dt, order="F"
+        )
 
-        self.visible = np.full(
-            (width, height), fill_value=False, order="F"
-        )  # tiles player can currently see
-        self.explored = np.full(
-            (width, height), fill_value=True, order="F"
-        )  # tiles player has seen before
+        self.visible = BitMask((width, height), fill_value=False)  # tiles player can currently see
+        self.explored = BitMask((width, height), fill_value=True)  # tiles player has seen before
 
         self.downstairs_location = (0, 0)
-        self.chunks = {}
+
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.chunks_wide, self.chunks_high = width // chunk_size, height // chunk_size
+        # the chunks of the window must always fit in memory
+        self.max_resident_chunks = max(max_resident_chunks, self.chunks_wide * self.chunks_high)
+        self.chunks: OrderedDict[Tuple[int, int], Chunk] = OrderedDict()
+        self.chunk_store = ChunkStore(engine.disk_store)
+        # chunk coordinates of the top left chunk of the window
+        self.origin = (0, 0)
+
+    def get_world_location(self, x: int, y: int) -> Tuple[int, int]:
+        return x + self.origin[0] * self.chunk_size, y + self.origin[1] * self.chunk_size
 
     def get_chunk(self, coordinates: Tuple[int, int]) -> Chunk:
+        """return the chunk at the given chunk coordinates, loading or generating it if needed"""
         chunk = self.chunks.get(coordinates)
         if chunk:
+            self.chunks.move_to_end(coordinates)
             return chunk
-        else:
-            pass
-#             genereate it
 
+        chunk = self.chunk_store.load(coordinates)
+        if chunk is None:
+            from world_procgen import generate_chunk
+
+            chunk = generate_chunk(*coordinates, size=self.chunk_size, seed=self.seed)
+
+        self.chunks[coordinates] = chunk
+        while len(self.chunks) > self.max_resident_chunks:
+            _, evicted_chunk = self.chunks.popitem(last=False)
+            self.chunk_store.save(evicted_chunk)
+        return chunk
+
+    def get_window_chunks(self) -> Iterator[Tuple[Chunk, Tuple[slice, slice]]]:
+        """iterate over the chunks of the window, and the area of the map arrays they cover"""
+        size = self.chunk_size
+        for i in range(self.chunks_wide):
+            for j in range(self.chunks_high):
+                chunk = self.get_chunk((self.origin[0] + i, self.origin[1] + j))
+                yield chunk, (slice(i * size, (i + 1) * size), slice(j * size, (j + 1) * size))
+
+    @staticmethod
+    def translate_entity(entity: Entity, dx: int, dy: int) -> None:
+        """move an entity that is not indexed by any map to other coordinates"""
+        entity.x += dx
+        entity.y += dy
+        ai = getattr(entity, "ai", None)
+        if ai:
+            ai.translate(dx, dy)
+
+    def store_window(self, keep: Entity) -> None:
+        """copy the tiles and entities of the window back into their chunks, except for `keep`"""
+        for chunk, area in self.get_window_chunks():
+            chunk.tiles = self.tiles[area].copy(order="F")
+            chunk.explored = BitMask.from_array(self.explored[area])
+
+        offset_x, offset_y = self.get_world_location(0, 0)
+        for entity in list(self.entities):
+            if entity is keep:
+                continue
+            self.remove_entity(entity)
+            del entity.parent
+            self.translate_entity(entity, offset_x, offset_y)
+            chunk = self.get_chunk((entity.x // self.chunk_size, entity.y // self.chunk_size))
+            chunk.entities.add(entity)
+
+    def load_window(self, origin: Tuple[int, int]) -> None:
+        """fill the window with the tiles and entities of the chunks starting at origin"""
+        self.origin = origin
+        offset_x, offset_y = self.get_world_location(0, 0)
+        for chunk, area in self.get_window_chunks():
+            self.tiles[area] = chunk.tiles
+            self.explored[area] = chunk.explored.to_array()
+            # the window owns the entities now, until it is stored again
+            for entity in chunk.entities:
+                self.translate_entity(entity, -offset_x, -offset_y)
+                entity.place(entity.x, entity.y, self)
+            chunk.entities = set()
+
+        self.visible.fill(False)
+        self.fov_region = None
+        self.mark_tiles_changed()
+
+    def follow(self, entity: Entity) -> None:
+        """recenter the window when the entity has moved into another chunk"""
+        world_x, world_y = self.get_world_location(entity.x, entity.y)
+        origin = (
+            world_x // self.chunk_size - self.chunks_wide // 2,
+            world_y // self.chunk_size - self.chunks_high // 2,
+        )
+        if origin == self.origin:
+            return
+
+        self.store_window(keep=entity)
+        self.remove_entity(entity)
+        self.translate_entity(
+            entity,
+            (self.origin[0] - origin[0]) * self.chunk_size,
+            (self.origin[1] - origin[1]) * self.chunk_size,
+        )
+        self.add_entity(entity)
+        self.load_window(origin)
+
+class FloorRecord:
+    """
+    A visited dungeon floor, stored as the seed it was generated from plus what changed since
+    Restoring it regenerates the floor from the seed, and applies the changes on top
+    Actors keep their location and hp, but their AI starts over
+    """
+
+    def __init__(self, dungeon: DungeonGameMap, generated_tiles: np.ndarray, floor_number: int, seed: int):
+        """record the changes of `dungeon` compared to `generated_tiles`, the tiles of the same floor fresh from procgen"""
+        self.floor_number = floor_number
+        self.seed = seed
+        self.explored = dungeon.explored.copy()
+
+        changed = dungeon.tiles != generated_tiles
+        self.tile_changes = (np.nonzero(changed), dungeon.tiles[changed])
+
+        # state of each generated entity by generation order, or None if it left the floor
+        self.entity_states: List[Optional[Tuple[int, int, Optional[int]]]] = []
+        for entity in dungeon.generated_entities:
+            if entity not in dungeon.entities:
+                self.entity_states.append(None)
+            elif isinstance(entity, Actor):
+                self.entity_states.append((entity.x, entity.y, entity.fighter.hp))
+            else:
+                self.entity_states.append((entity.x, entity.y, None))
+
+        # entities that weren't generated, like dropped items, are kept entirely
+        generated_entities = set(dungeon.generated_entities)
+        self.added_entities: List[Entity] = []
+        for entity in list(dungeon.entities):
+            if entity not in generated_entities and entity is not dungeon.engine.player:
+                dungeon.remove_entity(entity)
+                del entity.parent
+                self.added_entities.append(entity)
+
+    def restore(self, generated: DungeonGameMap) -> DungeonGameMap:
+        """
+        apply the recorded changes to the freshly generated floor, and return it
+        the added entities are moved onto the floor, so a record can only be restored once
+        """
+        generated.explored = self.explored
+
+        tile_indexes, tiles = self.tile_changes
+        generated.tiles[tile_indexes] = tiles
+
+        for entity, state in zip(generated.generated_entities, self.entity_states):
+            if state is None:
+                generated.remove_entity(entity)
+                continue
+            x, y, hp = state
+            entity.place(x, y)
+            if hp == 0:
+                entity.fighter.become_remains()
+            elif hp is not None:
+                entity.fighter.hp = hp
+
+        for entity in self.added_entities:
+            entity.place(entity.x, entity.y, generated)
+        self.added_entities = []
+
+        generated.mark_tiles_changed()
+        return generated
+
+class FloorCache:
+    """
+    LRU of the floors that were left, kept in memory as compressed records up to `memory_budget`
+    bytes. The least recently used floors beyond the budget are evicted to the disk store of the game
+    """
+
+    def __init__(self, disk_store: DiskStore, memory_budget: int = 1_000_000):
+        self.disk_store = disk_store
+        self.memory_budget = memory_budget
+        self.floors: OrderedDict[int, bytes] = OrderedDict()
+        self.memory_used = 0
+
+    @staticmethod
+    def get_name(floor_number: int) -> str:
+        return f"{floor_number}.floor"
+
+    def __contains__(self, floor_number: int) -> bool:
+        return floor_number in self.floors or self.get_name(floor_number) in self.disk_store
+
+    def put(self, record: FloorRecord) -> None:
+        self.pop(record.floor_number)
+        data = lzma.compress(pickle.dumps(record))
+        self.floors[record.floor_number] = data
+        self.memory_used += len(data)
+
+        while self.memory_used > self.memory_budget and self.floors:
+            floor_number, evicted_data = self.floors.popitem(last=False)
+            self.memory_used -= len(evicted_data)
+            self.disk_store.write(self.get_name(floor_number), evicted_data)
+
+    def pop(self, floor_number: int) -> Optional[FloorRecord]:
+        """remove a floor from the cache and return its record, or None if it isnt cached"""
+        data = self.floors.pop(floor_number, None)
+        if data is not None:
+            self.memory_used -= len(data)
+        else:
+            data = self.disk_store.read(self.get_name(floor_number))
+            if data is None:
+                return None
+            # saves written before keep their copy of the floor
+            self.disk_store.remove(self.get_name(floor_number))
+        return pickle.loads(lzma.decompress(data))
+
+    def clear(self) -> None:
+        self.floors.clear()
+        self.memory_used = 0
+        self.disk_store.clear(".floor")
 
 class GameWorld:
     """
     Holds the settings for the GameMap, and generates new maps when moving down stairs
+    Every floor is generated from its own seed, derived from the world seed
+    With `pregenerate`, the next floor is generated on a worker thread while the current one is played
+    `use_actor_store` is passed on to the maps it generates, see GameMap.actor_store
     """
 
     def __init__(
@@ -178,7 +622,11 @@ class GameWorld:
             max_rooms: int,
             room_max_size: int,
             room_min_size: int,
-            current_floor: int = 0
+            current_floor: int = 0,
+            pregenerate: bool = True,
+            seed: Optional[int] = None,
+            floor_memory_budget: int = 1_000_000,
+            use_actor_store: bool = True,
     ):
         self.engine = engine
         self.map_width = map_width
@@ -187,21 +635,103 @@ class GameWorld:
         self.room_max_size = room_max_size
         self.room_min_size = room_min_size
         self.current_floor = current_floor
-
-    def generate_floor(self) -> None:
+        self.pregenerate = pregenerate
+        self.use_actor_store = use_actor_store
+        self.seed = random.getrandbits(32) if seed is None else seed
+
+        # floors that were left. The current floor is always the engine's game map
+        self.floor_cache = FloorCache(engine.disk_store, floor_memory_budget)
+        self.next_floor: Optional[Future[DungeonGameMap]] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    def __getstate__(self) -> dict:
+        # worker threads can't be saved, the next floor will be generated again when needed
+        state = self.__dict__.copy()
+        state["next_floor"] = None
+        state["executor"] = None
+        return state
+
+    def get_floor_seed(self, floor_number: int) -> int:
+        """return the seed a floor is generated from, always the same for the same world seed"""
+        return random.Random(f"{self.seed}/{floor_number}").getrandbits(32)
+
+    def build_floor(self, floor_number: int) -> DungeonGameMap:
         from dungeon_procgen import generate_dungeon
 
-        self.current_floor += 1
-
-        self.engine.game_map = generate_dungeon(
+        return generate_dungeon(
             max_rooms=self.max_rooms,
             room_max_size=self.room_max_size,
             room_min_size=self.room_min_size,
             map_width=self.map_width,
             map_height=self.map_height,
-            engine=self.engine
+            engine=self.engine,
+            floor_number=floor_number,
+            rng=random.Random(self.get_floor_seed(floor_number)),
+            use_actor_store=self.use_actor_store,
         )
 
+    def record_floor(self, dungeon: DungeonGameMap, floor_number: int) -> FloorRecord:
+        """return a compact record of a floor. The floor's non generated entities are moved into it"""
+        generated_tiles = dungeon.generated_tiles
+        if generated_tiles is None:
+            # a floor that wasn't made by procgen
+            generated_tiles = self.build_floor(floor_number).tiles
+        return FloorRecord(dungeon, generated_tiles, floor_number, self.get_floor_seed(floor_number))
+
+    def restore_floor(self, record: FloorRecord) -> DungeonGameMap:
+        return record.restore(self.build_floor(record.floor_number))
+
+    def start_next_floor(self) -> None:
+        """start generating the floor below the current one on the worker thread"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        self.next_floor = self.executor.submit(self.build_floor, self.current_floor + 1)
+
+    def take_next_floor(self) -> DungeonGameMap:
+        """return the pregenerated next floor, or generate it now if it was never started or failed"""
+        if self.next_floor is not None:
+            try:
+                # waits if the worker is still busy, which is never slower than starting over
+                return self.next_floor.result()
+            except Exception:
+                traceback.print_exc()
+            finally:
+                self.next_floor = None
+        return self.build_floor(self.current_floor + 1)
+
+    def change_floor(self, floor_number: int) -> None:
+        """
+        leave the current floor for another one, which is restored if it was visited before
+        the player arrives at the start of the floor when going down, and at the stairs when going up
+        """
+        previous_floor = getattr(self.engine, "game_map", None)
+        if isinstance(previous_floor, DungeonGameMap) and not isinstance(previous_floor, WorldGameMap):
+            self.floor_cache.put(self.record_floor(previous_floor, self.current_floor))
+
+        record = self.floor_cache.pop(floor_number)
+        if record is not None:
+            dungeon = self.restore_floor(record)
+        elif floor_number == self.current_floor + 1:
+            dungeon = self.take_next_floor()
+        else:
+            dungeon = self.build_floor(floor_number)
+
+        going_down = floor_number > self.current_floor
+        self.current_floor = floor_number
+
+        self.engine.game_map = dungeon
+        if going_down:
+            self.engine.player.place(*dungeon.player_start_location, dungeon)
+        else:
+            self.engine.player.place(*dungeon.downstairs_location, dungeon)
+
+        self.next_floor = None
+        if self.pregenerate and self.current_floor + 1 not in self.floor_cache:
+            self.start_next_floor()
+
+    def generate_floor(self) -> None:
+        self.change_floor(self.current_floor + 1)
+
     def generate_overworld(self) -> None:
         from world_procgen import generate_world
 
@@ -209,4 +739,5 @@ class GameWorld:
             world_width=self.map_width,
             world_height=self.map_height,
             engine=self.engine,
+            use_actor_store=self.use_actor_store,
         )
@@ -132,8 +132,11 @@ class EventHandler(BaseEventHandler):
             self.engine.message_log.add_message(ex.args[0], color.impossible)
             return False
 
+        action.entity.mark_changed()
+        self.engine.game_map.follow(self.engine.player)
         self.engine.handle_enemy_turns()
         self.engine.update_fov()
+        self.engine.autosave_if_due()
         return True
 
     def ev_mousemotion(self, event: tcod.event.MouseMotion) -> None:
@@ -187,6 +190,7 @@ class MainGameEventHandler(EventHandler):
             for actor in self.engine.game_map.actors:
                 if self.engine.mouse_location == (actor.x, actor.y):
                     self.engine.player.observing = actor
+                    self.engine.player.mark_changed()
                     return CharacterScreenEventHandler(self.engine)
 
         return None
@@ -194,8 +198,13 @@ class MainGameEventHandler(EventHandler):
 
 class GameOverEventHandler(EventHandler):
     def on_quit(self) -> None:
-        if os.path.exists("savegame.sav"):
-            os.remove("savegame.sav") # delete save file on death (bug if loaded again)
+        if self.engine.save_file is not None:
+            # an autosave still being written would bring the save back
+            self.engine.save_file.wait()
+        if os.path.exists(self.engine.autosave_filename):
+            os.remove(self.engine.autosave_filename) # delete save file on death (bug if loaded again)
+        # the floors and chunks moved out of memory only belong to that save
+        self.engine.disk_store.close()
         raise exceptions.QuitWithoutSaving() # skips saving again
 
     def ev_keydown(self, event: tcod.event.KeyDown) -> None:
@@ -625,4 +634,5 @@ class CharacterScreenEventHandler(AskUserEventHandler):
             self, event: tcod.event.MouseButtonDown
     ) -> Optional[ActionOrHandler]:
         self.engine.player.observing = self.engine.player
+        self.engine.player.mark_changed()
         return super().on_exit()
@@ -14,10 +14,10 @@ import exceptions
 import input_handlers
 from camera import Camera
 
-def save_game(handler: input_handlers.BaseEventHandler, filename: str) -> None:
-    """if the current event handler has an active Engine, save it"""
+def save_game(handler: input_handlers.BaseEventHandler) -> None:
+    """if the current event handler has an active Engine, save it to its save slot"""
     if isinstance(handler, input_handlers.EventHandler):
-        handler.engine.save_as(filename)
+        handler.engine.save_as(handler.engine.autosave_filename)
         print("Game saved")
 
 def main() -> None:
@@ -57,10 +57,10 @@ def main() -> None:
         except exceptions.QuitWithoutSaving:
             raise
         except SystemExit:
-            save_game(handler, "savegame.sav")
+            save_game(handler)
             raise
         except BaseException:
-            save_game(handler, "savegame.sav")
+            save_game(handler)
             raise
 
 
@@ -29,7 +29,7 @@ def get_names_at_location(x: int, y: int, game_map: GameMap) -> str:
         return ""
 
     names = ", ".join(
-        entity.name for entity in game_map.entities if entity.x == x and entity.y == y
+        entity.name for entity in game_map.get_entities_at_location(x, y)
     )
 
     return names.capitalize()
@@ -59,5 +59,6 @@ def render_player_coords(
         console: Console, player: Entity, location: Tuple[int, int]
 ):
     x, y = location
+    world_x, world_y = player.game_map.get_world_location(player.x, player.y)
 
-    console.print(x=x, y=y, string=f"Coords: {player.x},{player.y}")
\ No newline at end of file
+    console.print(x=x, y=y, string=f"Coords: {world_x},{world_y}")
\ No newline at end of file
@@ -0,0 +1,648 @@
+"""save games as a base snapshot of the engine, followed by records of what changed since"""
+from __future__ import annotations
+
+import glob
+import io
+import mmap
+import os
+import pickle
+import struct
+import time
+import traceback
+import types
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import columnar
+from actor_store import STORED_FIELDS
+from components.inventory import Inventory
+from entity import Actor, Entity
+
+if TYPE_CHECKING:
+    from disk_store import DiskStore
+    from engine import Engine
+    from game_map import GameMap
+
+# saves with another version can't be loaded
+MAGIC = b"RLSAVE\x04\n"
+# floor, level, hp, max hp, playtime and time of the save, right after the magic
+METADATA = struct.Struct("<iiiidd")
+# a columnar snapshot, see columnar.py
+BASE_RECORD = b"C"
+DELTA_RECORD = b"D"
+# kind of record, codec of its payload and length of its payload
+RECORD_HEADER = struct.Struct("<c5sI")
+
+def get_state(obj: Any) -> Any:
+    return obj.__getstate__()
+
+def set_state(obj: Any, state: Any) -> None:
+    """replace the state of an existing object with a state returned by its __getstate__"""
+    if isinstance(state, tuple):
+        dict_state, slot_state = state
+    else:
+        dict_state, slot_state = state, {}
+    if dict_state:
+        obj.__dict__.clear()
+        obj.__dict__.update(dict_state)
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            # slots that are unset in the state, e.g. the parent of an entity that was removed
+            if name not in slot_state and isinstance(
+                    getattr(type(obj), name, None), types.MemberDescriptorType
+            ) and hasattr(obj, name):
+                delattr(obj, name)
+    for name, value in slot_state.items():
+        setattr(obj, name, value)
+
+class SaveMetadata:
+    """
+    A summary of a save for listing save slots. It is stored uncompressed at the start of the
+    file and rewritten on every save, so it can be read without loading the records
+    """
+    __slots__ = ("floor", "level", "hp", "max_hp", "playtime", "saved_at")
+
+    def __init__(self, floor: int, level: int, hp: int, max_hp: int, playtime: float, saved_at: float):
+        self.floor = floor
+        self.level = level
+        self.hp = hp
+        self.max_hp = max_hp
+        # seconds
+        self.playtime = playtime
+        # unix time
+        self.saved_at = saved_at
+
+    @classmethod
+    def from_engine(cls, engine: Engine) -> SaveMetadata:
+        player = engine.player
+        return cls(
+            engine.game_world.current_floor,
+            player.level.current_level,
+            player.fighter.hp,
+            player.fighter.max_hp,
+            engine.get_playtime(),
+            time.time(),
+        )
+
+    @classmethod
+    def read(cls, filename: str) -> Optional[SaveMetadata]:
+        """read the metadata of a save file, returns None for files that aren't saves of this version"""
+        with open(filename, "rb") as f:
+            data = f.read(len(MAGIC) + METADATA.size)
+        if data[:len(MAGIC)] != MAGIC or len(data) < len(MAGIC) + METADATA.size:
+            return None
+        return cls(*METADATA.unpack_from(data, len(MAGIC)))
+
+    def pack(self) -> bytes:
+        return METADATA.pack(self.floor, self.level, self.hp, self.max_hp, self.playtime, self.saved_at)
+
+def list_saves(directory: str = ".") -> List[Tuple[str, Optional[SaveMetadata]]]:
+    """return the save files in a directory with their metadata, the most recently written first"""
+    saves = []
+    for filename in glob.glob(os.path.join(directory, "*.sav")):
+        try:
+            saves.append((os.path.getmtime(filename), filename, SaveMetadata.read(filename)))
+        except OSError:
+            # deleted while listing, or unreadable
+            continue
+    saves.sort(key=lambda save: save[0], reverse=True)
+    return [(filename, metadata) for _, filename, metadata in saves]
+
+def new_save_filename(directory: str = ".") -> str:
+    """return the name of the first unused save slot"""
+    slot = 1
+    while os.path.exists(os.path.join(directory, f"slot{slot}.sav")):
+        slot += 1
+    return os.path.join(directory, f"slot{slot}.sav")
+
+# types that are never saved as a reference
+PLAIN_TYPES = frozenset((str, int, float, bool, type(None), tuple, list, dict, set, bytes))
+
+class EntityPickler(pickle.Pickler):
+    """
+    pickles parts of the engine, with references to the map, to entities and to inventories
+    other than the inventory of `owner` saved as keys, so they resolve to the existing objects
+    when loaded
+    """
+
+    def __init__(self, file: io.BytesIO, save_file: SaveFile, owner: Optional[Entity] = None):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.save_file = save_file
+        self.owner = owner
+
+    def persistent_id(self, obj: Any) -> Optional[Tuple]:
+        if type(obj) in PLAIN_TYPES:
+            # called for every object pickled, most of them
+            return None
+        save_file = self.save_file
+        game_map = save_file.game_map
+        if obj is game_map:
+            return ("map",)
+        if obj is game_map.actor_store and obj is not None:
+            return ("actor_store",)
+        if obj is game_map.engine:
+            return ("engine",)
+        if isinstance(obj, Entity):
+            return ("entity", save_file.get_key(obj))
+        if isinstance(obj, Inventory) and obj.parent is not self.owner:
+            return ("inventory", save_file.get_key(obj.parent))
+        return None
+
+class EntityUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, engine: Engine, entities: List[Entity]):
+        super().__init__(file)
+        self.engine = engine
+        self.entities = entities
+
+    def persistent_load(self, pid: Tuple) -> Any:
+        kind = pid[0]
+        if kind == "map":
+            return self.engine.game_map
+        if kind == "actor_store":
+            return self.engine.game_map.actor_store
+        if kind == "engine":
+            return self.engine
+        if kind == "entity":
+            return self.entities[pid[1]]
+        if kind == "inventory":
+            return self.entities[pid[1]].inventory
+        raise pickle.UnpicklingError(f"unknown persistent id {pid}")
+
+class SaveFile:
+    """
+    A save file that starts with a base snapshot of the engine, followed by append only delta
+    records of the changed tiles, the changed entities, the changed files of the disk store and
+    the new messages since the previous save. The map flags the entities and regions of tiles that change, see
+    GameMap.changed_entities, so a delta only looks at those. Saving writes a delta while the
+    player stays on the same map, and a new base snapshot on a new map. After
+    `compaction_interval` deltas the file is compacted into a base.
+    Loading replays the deltas on top of the base
+    `codec` is one of columnar.CODECS, records are compressed with it
+
+    Only the snapshot of the engine is taken on the game thread, records are compressed and
+    written in order on a worker thread. Compaction loads the file on the worker thread and
+    writes the base from that, so only a new map takes a full snapshot on the game thread.
+    The files of the disk store are a section of the base: the game thread only reads the files
+    changed since the last save, the worker carries the others over from the file being replaced.
+    A base is written to a temporary file that replaces the save once complete, and a delta cut
+    short by a crash is ignored when loading, so the file always holds the last completely
+    written save
+    """
+
+    def __init__(self, filename: str, compaction_interval: int = 50, codec: str = "zlib"):
+        self.filename = filename
+        self.compaction_interval = compaction_interval
+        self.codec = codec
+        self.delta_count = 0
+
+        # entities that can be referenced by delta records, the index of an entity is its key
+        self.game_map: Optional[GameMap] = None
+        self.entities: List[Entity] = []
+        self.keys: Dict[int, int] = {}
+        self.new_entities: List[int] = []
+        # state as of the last save, to find what changed since
+        self.entity_states: List[bytes] = []
+        self.store_arrays: Dict[str, np.ndarray] = {}
+        self.origin: Optional[Tuple[int, int]] = None
+        self.disk_store: Optional[DiskStore] = None
+        self.message_count = 0
+
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.pending: Optional[Future[None]] = None
+        # set when the end of the file can't be trusted, appending to it would lose the deltas
+        self.needs_base = False
+
+    def get_key(self, entity: Entity) -> int:
+        """return the key of an entity, starting to track it if it is new"""
+        key = self.keys.get(id(entity))
+        if key is None:
+            key = len(self.entities)
+            self.entities.append(entity)
+            self.entity_states.append(b"")
+            self.keys[id(entity)] = key
+            self.new_entities.append(key)
+        return key
+
+    def track(self, engine: Engine, entities: List[Entity]) -> None:
+        """start tracking changes to the current map and the given entities, as saved in full"""
+        game_map = self.game_map = engine.game_map
+        self.entities = entities
+        self.keys = {id(entity): key for key, entity in enumerate(entities)}
+        self.new_entities = []
+        for entity in self.iter_map_entities():
+            self.get_key(entity)
+        self.new_entities = []
+        # unknown until an entity changes, its first delta saves it in full
+        self.entity_states = [b""] * len(self.entities)
+        game_map.changed_entities = set()
+        game_map.unsaved_regions = []
+        actor_store = game_map.actor_store
+        self.store_arrays = {
+            field: getattr(actor_store, field).copy() for field in STORED_FIELDS + ("occupied",)
+        } if actor_store is not None else {}
+        # the window of the overworld is saved with its resident chunks, so moving it takes a base
+        self.origin = getattr(game_map, "origin", None)
+        # the base has every file of the disk store
+        self.disk_store = engine.disk_store
+        self.disk_store.unsaved = set()
+        self.message_count = len(engine.message_log.messages)
+
+    def iter_map_entities(self) -> Iterator[Entity]:
+        """iterate over the entities of the map, and the items in the inventories of its actors"""
+        for entity in self.game_map.entities:
+            yield entity
+            if isinstance(entity, Actor):
+                yield from entity.inventory.items
+
+    def dumps(self, obj: Any, owner: Optional[Entity] = None) -> bytes:
+        file = io.BytesIO()
+        EntityPickler(file, self, owner).dump(obj)
+        return file.getvalue()
+
+    def loads(self, data: bytes, engine: Engine) -> Any:
+        return EntityUnpickler(io.BytesIO(data), engine, self.entities).load()
+
+    def update_entity_states(self) -> Dict[int, Tuple[Optional[bytes], bool]]:
+        """
+        pickle the state of the entities the map flagged as changed, and of new entities
+        returns the new state of each, or None if it is the same as saved, and whether it is
+        on the map
+        """
+        game_map = self.game_map
+        count = len(self.entities)
+        keys = {self.get_key(entity) for entity in game_map.changed_entities}
+        game_map.changed_entities = set()
+        keys.update(range(count, len(self.entities)))
+        count = len(self.entities)
+
+        changed = {}
+        pending = sorted(keys)
+        while pending:
+            key = pending.pop()
+            entity = self.entities[key]
+            state = self.dumps(get_state(entity), owner=entity)
+            if state == self.entity_states[key]:
+                state = None
+            else:
+                self.entity_states[key] = state
+            changed[key] = (state, entity in game_map.entities)
+            # entities first referenced while pickling are new, and saved in the same record
+            pending.extend(range(count, len(self.entities)))
+            count = len(self.entities)
+        return changed
+
+    def get_store_changes(self) -> Dict[str, Tuple[Any, np.ndarray]]:
+        """return the changed rows of each array of the actor store, or the whole array if it grew"""
+        actor_store = self.game_map.actor_store
+        changes = {}
+        for field, saved in self.store_arrays.items():
+            current = getattr(actor_store, field)
+            if current.shape != saved.shape:
+                self.store_arrays[field] = current.copy()
+                changes[field] = (None, self.store_arrays[field])
+            else:
+                changes[field] = self.get_changes(saved, current)
+        return changes
+
+    def get_unsaved_tiles(self) -> Tuple[Optional[Tuple[slice, slice]], Dict[str, np.ndarray]]:
+        """
+        return the bounding box of the regions of tiles the map flagged as changed, and the
+        tiles, explored and visible bits inside of it
+        """
+        game_map = self.game_map
+        regions, game_map.unsaved_regions = game_map.unsaved_regions, []
+        if not regions:
+            return None, {}
+        width, height = game_map.width, game_map.height
+        x_ranges = [region[0].indices(width)[:2] for region in regions]
+        y_ranges = [region[1].indices(height)[:2] for region in regions]
+        x = slice(min(start for start, _ in x_ranges), max(stop for _, stop in x_ranges))
+        y = slice(min(start for start, _ in y_ranges), max(stop for _, stop in y_ranges))
+        # 8 rows of a bit mask per byte
+        y_bytes = slice(y.start // 8, (y.stop + 7) // 8)
+        return (x, y), {
+            "tiles": game_map.tiles[x, y].copy(),
+            "explored": game_map.explored.bits[x, y_bytes].copy(),
+            "visible": game_map.visible.bits[x, y_bytes].copy(),
+        }
+
+    def save(self, engine: Engine, wait: bool = True) -> None:
+        """
+        save the engine as a delta or a new base
+        without `wait` this returns as soon as the snapshot is taken, and the file is written
+        in the background
+        """
+        if (
+            engine.game_map is not self.game_map
+            or getattr(engine.game_map, "origin", None) != self.origin
+            or self.needs_base
+            or (self.is_written() and not os.path.exists(self.filename))
+        ):
+            write = self.snapshot_base(engine)
+        elif self.delta_count >= self.compaction_interval:
+            write = self.snapshot_compaction(engine)
+        else:
+            write = self.snapshot_delta(engine)
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = self.executor.submit(self.run_write, write)
+        if wait:
+            self.wait()
+
+    def is_written(self) -> bool:
+        """returns true if no write is queued or running"""
+        return self.pending is None or self.pending.done()
+
+    def wait(self) -> None:
+        """wait until every queued write is done, raising the error of the last one if it failed"""
+        if self.pending is not None:
+            self.pending.result()
+
+    def run_write(self, write: Callable[[], None]) -> None:
+        try:
+            write()
+        except BaseException:
+            # the file may end in a partial delta, or still be the previous base
+            self.needs_base = True
+            traceback.print_exc()
+            raise
+
+    def snapshot_base(self, engine: Engine) -> Callable[[], None]:
+        """take a base snapshot of the engine, and return a function that writes it"""
+        disk_store = engine.disk_store
+        stored_names = disk_store.get_names()
+        if (
+            disk_store is self.disk_store
+            and not self.needs_base
+            and (os.path.exists(self.filename) or not self.is_written())
+        ):
+            # the file has the other files as of the last save, the worker carries them over
+            stored_files: Optional[Dict[str, Optional[bytes]]] = disk_store.take_unsaved()
+        else:
+            stored_files = None
+
+        self.game_map = engine.game_map
+        # the rows of the entity table are the keys of the entities
+        entities = list(self.iter_map_entities())
+        sections = columnar.take_snapshot(engine, entities)
+        if stored_files is None:
+            sections["stored_files"] = self.pack_stored_files(disk_store.read_all())
+        # the arrays may be mapped from the file that is about to be replaced
+        columnar.release_mapped_arrays(engine)
+        self.delta_count = 0
+        self.track(engine, entities)
+        metadata = SaveMetadata.from_engine(engine).pack()
+        codec = self.codec
+
+        def write() -> None:
+            if stored_files is not None:
+                sections["stored_files"] = self.carry_over_stored_files(stored_names, stored_files)
+            self.write_base(sections, metadata, codec)
+        return write
+
+    def carry_over_stored_files(self, names: List[str], changed_files: Dict[str, Optional[bytes]]) -> np.ndarray:
+        """return the section with the given files of the disk store, from the save file and the files changed since"""
+        if self.needs_base:
+            raise ValueError(f"{self.filename} is missing records, its stored files can't be carried over")
+        files = self.read_stored_files()
+        files.update(changed_files)
+        return self.pack_stored_files({name: files[name] for name in names})
+
+    @staticmethod
+    def pack_stored_files(files: Dict[str, bytes]) -> np.ndarray:
+        return np.frombuffer(pickle.dumps(files, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8)
+
+    def write_base(self, sections: Dict[str, np.ndarray], metadata: bytes, codec: str) -> None:
+        """replace the file with a base snapshot"""
+        snapshot = io.BytesIO()
+        columnar.write_sections(snapshot, sections, codec)
+        payload = snapshot.getvalue()
+
+        temporary_filename = self.filename + ".tmp"
+        with open(temporary_filename, "wb") as f:
+            f.write(MAGIC)
+            f.write(metadata)
+            f.write(RECORD_HEADER.pack(BASE_RECORD, codec.encode(), len(payload)))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_filename, self.filename)
+        self.needs_base = False
+
+    def snapshot_compaction(self, engine: Engine) -> Callable[[], None]:
+        """take a delta, and return a function that appends it and then compacts the file"""
+        write_delta = self.snapshot_delta(engine)
+        self.delta_count = 0
+        key_count = len(self.entities)
+        metadata = SaveMetadata.from_engine(engine).pack()
+        codec = self.codec
+
+        def write() -> None:
+            write_delta()
+            self.compact(key_count, metadata, codec)
+        return write
+
+    def compact(self, key_count: int, metadata: bytes, codec: str) -> None:
+        """
+        replace the file with a base of the engine loaded from it
+        the rows of the base are the keys of the records, so later deltas still apply to it
+        """
+        if self.needs_base:
+            # the file is missing records, the next save writes a base of the game instead
+            return
+        engine = type(self).load(self.filename)
+        entities = list(engine.save_file.entities)
+        if len(entities) != key_count:
+            raise ValueError(f"{self.filename} has {len(entities)} entities, expected {key_count}")
+        sections = columnar.take_snapshot(engine, entities)
+        sections["stored_files"] = self.pack_stored_files(engine.disk_store.read_all())
+        columnar.release_mapped_arrays(engine)
+        engine.disk_store.close()
+        self.write_base(sections, metadata, codec)
+
+    def snapshot_delta(self, engine: Engine) -> Callable[[], None]:
+        """take a record of what changed since the last save, and return a function that appends it"""
+        game_map = self.game_map
+
+        changed_entities = self.update_entity_states()
+        # small parts that are cheaper to save in full than to compare
+        map_state = self.dumps((game_map.scheduler, game_map.fov_key, game_map.fov_region))
+        new_entities = [(key, type(self.entities[key])) for key in self.new_entities]
+        self.new_entities = []
+        region, tiles = self.get_unsaved_tiles()
+
+        messages = engine.message_log.messages
+        # the last saved message is saved again, its count may have gone up
+        first_message = max(0, self.message_count - 1)
+
+        record = {
+            "new_entities": new_entities,
+            "entities": changed_entities,
+            "map_state": map_state,
+            "actor_store": self.get_store_changes(),
+            "disk_store": engine.disk_store.take_unsaved(),
+            "region": region,
+            "tiles": tiles,
+            "messages": (first_message, messages[first_message:]),
+            "playtime": engine.get_playtime(),
+        }
+        # pickled right away, the messages can still change
+        data = pickle.dumps(record)
+        self.delta_count += 1
+        self.message_count = len(messages)
+        metadata = SaveMetadata.from_engine(engine).pack()
+        codec = self.codec
+        return lambda: self.write_delta(data, metadata, codec)
+
+    def write_delta(self, data: bytes, metadata: bytes, codec: str) -> None:
+        """append a delta record to the file, then update the metadata to match"""
+        if self.needs_base:
+            # a previous write failed, the next save writes a base instead
+            return
+        compress, _ = columnar.CODECS[codec]
+        payload = compress(data)
+        with open(self.filename, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            f.write(RECORD_HEADER.pack(DELTA_RECORD, codec.encode(), len(payload)))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            # only once the record is in the file, a crash in between leaves the previous summary
+            f.seek(len(MAGIC))
+            f.write(metadata)
+
+    @staticmethod
+    def get_changes(saved: np.ndarray, current: np.ndarray) -> Tuple[Tuple[np.ndarray, ...], np.ndarray]:
+        """return the indices and values of the elements that changed, and update `saved`"""
+        indices = np.nonzero(saved != current)
+        values = current[indices]
+        saved[indices] = values
+        return indices, values
+
+    @staticmethod
+    def map_file(filename: str) -> memoryview:
+        """
+        map a save file copy on write, so uncompressed sections of the base can be used in place
+        raises ValueError if it isn't a save file of this version
+        """
+        with open(filename, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError(f"{os.path.basename(filename)} is empty")
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+        if data[:len(MAGIC)] != MAGIC:
+            # e.g. a plain pickle of the engine, from before save files had records. The classes
+            # it refers to have changed since, so it can't be loaded
+            raise ValueError(f"{os.path.basename(filename)} is not a save file of this version of the game")
+        return data
+
+    @staticmethod
+    def iter_records(data: memoryview) -> Iterator[Tuple[bytes, bytes, memoryview, int]]:
+        """
+        iterate over the kind, codec and payload of the records of a mapped save file, and the
+        offset each record ends at. A record cut short by a crash ends the iteration
+        """
+        offset = len(MAGIC) + METADATA.size
+        while offset + RECORD_HEADER.size <= len(data):
+            kind, codec, length = RECORD_HEADER.unpack_from(data, offset)
+            offset += RECORD_HEADER.size
+            if offset + length > len(data):
+                return
+            yield kind, codec.rstrip(b"\0"), data[offset:offset + length], offset + length
+            offset += length
+
+    @staticmethod
+    def decode_delta(codec: bytes, payload: memoryview) -> Dict[str, Any]:
+        _, decompress = columnar.CODECS[codec.decode()]
+        return pickle.loads(decompress(payload))
+
+    @classmethod
+    def load(cls, filename: str) -> Engine:
+        """load the engine from a save file, and keep saving to it with deltas"""
+        data = cls.map_file(filename)
+        save_file = cls(filename)
+        engine = None
+        end = len(MAGIC) + METADATA.size
+        for kind, codec, payload, end in cls.iter_records(data):
+            if kind == BASE_RECORD:
+                save_file.codec = codec.decode()
+                engine, save_file.entities = columnar.read_snapshot(payload)
+                save_file.game_map = engine.game_map
+                stored_files = columnar.read_section(payload, "stored_files")
+                if stored_files is not None:
+                    engine.disk_store.update(pickle.loads(stored_files.tobytes()))
+                continue
+            try:
+                record = cls.decode_delta(codec, payload)
+            except Exception:
+                if end < len(data):
+                    raise
+                # the game stopped before the last delta was completely written, the save
+                # ends at the previous one
+                save_file.needs_base = True
+                break
+            save_file.apply_delta(engine, record)
+            save_file.delta_count += 1
+        else:
+            if end < len(data):
+                # the game stopped while appending a delta, the save ends at the previous one
+                save_file.needs_base = True
+
+        if engine is None:
+            raise ValueError(f"{os.path.basename(filename)} has no complete save")
+        engine.game_map.rebuild_indexes()
+        save_file.track(engine, save_file.entities)
+        engine.save_file = save_file
+        engine.session_start = time.monotonic()
+        return engine
+
+    def read_stored_files(self) -> Dict[str, bytes]:
+        """read the files of the disk store as of the last save from the save file"""
+        files: Dict[str, Optional[bytes]] = {}
+        for kind, codec, payload, _ in self.iter_records(self.map_file(self.filename)):
+            if kind == BASE_RECORD:
+                stored_files = columnar.read_section(payload, "stored_files")
+                files = pickle.loads(stored_files.tobytes()) if stored_files is not None else {}
+            else:
+                files.update(self.decode_delta(codec, payload).get("disk_store", {}))
+        return {name: data for name, data in files.items() if data is not None}
+
+    def apply_delta(self, engine: Engine, record: Dict[str, Any]) -> None:
+        for key, entity_class in record["new_entities"]:
+            assert key == len(self.entities)
+            self.entities.append(entity_class.__new__(entity_class))
+
+        game_map = engine.game_map
+        game_map.scheduler, game_map.fov_key, game_map.fov_region = self.loads(record["map_state"], engine)
+
+        for key, (state, on_map) in record["entities"].items():
+            entity = self.entities[key]
+            if state is not None:
+                set_state(entity, self.loads(state, engine))
+            if on_map:
+                game_map.entities.add(entity)
+            else:
+                game_map.entities.discard(entity)
+
+        # actors hold on to the store, so it is updated in place. Its rows are rebuilt after loading
+        for field, (indices, values) in record["actor_store"].items():
+            if indices is None:
+                setattr(game_map.actor_store, field, values)
+            else:
+                getattr(game_map.actor_store, field)[indices] = values
+
+        if record["region"] is not None:
+            x, y = record["region"]
+            y_bytes = slice(y.start // 8, (y.stop + 7) // 8)
+            tiles = record["tiles"]
+            game_map.tiles[x, y] = tiles["tiles"]
+            game_map.explored.bits[x, y_bytes] = tiles["explored"]
+            game_map.visible.bits[x, y_bytes] = tiles["visible"]
+
+        engine.disk_store.update(record.get("disk_store", {}))
+
+        first_message, messages = record["messages"]
+        engine.message_log.messages[first_message:] = messages
+        engine.playtime = record.get("playtime", engine.playtime)
@@ -1,9 +1,7 @@
 """handle the loading and initialization of game sessions"""
 from __future__ import annotations
 
-import copy
-import lzma
-import pickle
+import os
 import traceback
 from typing import Optional
 import tcod
@@ -13,27 +11,29 @@ from engine import Engine
 import entity_factories
 import input_handlers
 from game_map import GameWorld
+from save_file import SaveFile, SaveMetadata, list_saves, new_save_filename
 
 #Load background image and remove alpha channel
 from sound_manager import SoundManager
 
 background_image = tcod.image.load("menu_background.png")[:, :, :3]
 
+SCREEN_WIDTH = 80
+SCREEN_HEIGHT = 50
+
 def new_game(type: int) -> Engine:
     """return a brand new game session as an engine instance"""
     map_width = 100
     map_height = 100
 
-    screen_width = 80
-    screen_height = 50
-
     room_max_size = 10
     room_min_size = 6
     max_rooms = 30
 
-    player = copy.deepcopy(entity_factories.player)
-    camera = Camera(x=0, y=0, width=screen_width, height=screen_height, map_width=map_width, map_height=map_height)
+    player = entity_factories.player.clone()
+    camera = Camera(x=0, y=0, width=SCREEN_WIDTH, height=SCREEN_HEIGHT, map_width=map_width, map_height=map_height)
     engine = Engine(player=player, camera=camera)
+    engine.autosave_filename = new_save_filename()
 
     engine.game_world = GameWorld(
         max_rooms=max_rooms,
@@ -55,8 +55,8 @@ def new_game(type: int) -> Engine:
     engine.message_log.add_message(
         "Welcome to the Jungle (you're gonna DIE)", color.welcome_text
     )
-    dagger = copy.deepcopy(entity_factories.dagger)
-    leather_armor = copy.deepcopy(entity_factories.leather_armor)
+    dagger = entity_factories.dagger.clone()
+    leather_armor = entity_factories.leather_armor.clone()
 
     dagger.parent = player.inventory
     leather_armor.parent = player.inventory
@@ -69,12 +69,33 @@ def new_game(type: int) -> Engine:
 
     return engine
 
+def describe_save(filename: str, metadata: Optional[SaveMetadata]) -> str:
+    """return a one line summary of a save slot"""
+    name = os.path.splitext(os.path.basename(filename))[0]
+    if metadata is None:
+        return f"{name}  (unsupported save)"
+    minutes, seconds = divmod(int(metadata.playtime), 60)
+    hours, minutes = divmod(minutes, 60)
+    return (
+        f"{name}  Floor {metadata.floor}  Level {metadata.level}  "
+        f"HP {metadata.hp}/{metadata.max_hp}  {hours}:{minutes:02}:{seconds:02}"
+    )
+
 def load_game(filename: str) -> Engine:
     """load an Engine instance from file"""
-    with open(filename, "rb") as f:
-        engine = pickle.loads(lzma.decompress(f.read()))
+    engine = SaveFile.load(filename)
     assert isinstance(engine, Engine)
-    engine.sound_manager.cacheSfx()
+    # keep saving to the slot it was loaded from
+    engine.autosave_filename = filename
+    engine.camera = Camera(
+        x=0,
+        y=0,
+        width=SCREEN_WIDTH,
+        height=SCREEN_HEIGHT,
+        map_width=engine.game_world.map_width,
+        map_height=engine.game_world.map_height,
+    )
+    engine.sound_manager = SoundManager()
     # engine.sound_manager.playBgm("assets/audio/noitd.wav")
     return engine
 
@@ -102,7 +123,7 @@ class MainMenu(input_handlers.BaseEventHandler):
 
         menu_width = 24
         for i, text in enumerate(
-            ["[N] Play a new game", "[C] Continue last game", "[Q] Quit"]
+            ["[N] Play a new game", "[C] Continue last game", "[L] Load a saved game", "[Q] Quit"]
         ):
             console.print(
                 console.width // 2,
@@ -119,15 +140,71 @@ class MainMenu(input_handlers.BaseEventHandler):
         if event.sym in (tcod.event.K_q, tcod.event.K_ESCAPE):
             raise SystemExit()
         elif event.sym == tcod.event.K_c:
-            try:
-                return input_handlers.MainGameEventHandler(load_game("savegame.sav"))
-            except FileNotFoundError:
+            saves = list_saves()
+            if not saves:
                 return input_handlers.PopupMessage(self, "No save game to load")
-            except Exception as e:
-                traceback.print_exc()
-                return input_handlers.PopupMessage(self, f"Failed to load save:\n{e}")
+            return continue_game(self, saves[0][0])
+        elif event.sym == tcod.event.K_l:
+            return SaveSlotMenu(self)
         elif event.sym == tcod.event.K_n:
             return input_handlers.MainGameEventHandler(new_game(1))
         elif event.sym == tcod.event.K_w:
             return input_handlers.MainGameEventHandler(new_game(2))
-        return None
\ No newline at end of file
+        return None
+
+def continue_game(
+        parent: input_handlers.BaseEventHandler, filename: str
+) -> input_handlers.BaseEventHandler:
+    """load a save, or return a popup over the parent if it can't be loaded"""
+    try:
+        return input_handlers.MainGameEventHandler(load_game(filename))
+    except FileNotFoundError:
+        return input_handlers.PopupMessage(parent, "No save game to load")
+    except Exception as e:
+        traceback.print_exc()
+        return input_handlers.PopupMessage(parent, f"Failed to load save:\n{e}")
+
+class SaveSlotMenu(input_handlers.BaseEventHandler):
+    """
+    list the save slots with a summary of each, and load the one the user selects
+    only the metadata at the start of each file is read, a save is loaded once it is selected
+    """
+    TITLE = "Select a save to load"
+
+    def __init__(self, parent: input_handlers.BaseEventHandler):
+        self.parent = parent
+        # at most one per letter
+        self.saves = list_saves()[:26]
+
+    def on_render(self, console: tcod.Console) -> None:
+        self.parent.on_render(console)
+        width = 60
+        height = max(3, len(self.saves) + 2)
+        x = (console.width - width) // 2
+        y = (console.height - height) // 2
+        console.draw_frame(
+            x=x,
+            y=y,
+            width=width,
+            height=height,
+            title=self.TITLE,
+            clear=True,
+            fg=(255, 255, 255),
+            bg=(0, 0, 0)
+        )
+        if self.saves:
+            for i, (filename, metadata) in enumerate(self.saves):
+                slot_key = chr(ord("a") + i)
+                console.print(x + 1, y + i + 1, f"({slot_key}) {describe_save(filename, metadata)}"[:width - 2])
+        else:
+            console.print(x + 1, y + 1, "(Empty)")
+
+    def ev_keydown(
+            self, event: tcod.event.KeyDown
+    ) -> Optional[input_handlers.BaseEventHandler]:
+        if event.sym == tcod.event.K_ESCAPE:
+            return self.parent
+        index = event.sym - tcod.event.K_a
+        if 0 <= index < len(self.saves):
+            return continue_game(self.parent, self.saves[index][0])
+        return None
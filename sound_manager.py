@@ -1,11 +1,47 @@
+import threading
+from typing import Dict, List, Optional
+
 import pygame.mixer
 
+SFX_FILES = {
+    "scoot": "assets/audio/scoot.wav",
+    "pling": "assets/audio/pling.wav",
+    "chew": "assets/audio/chew.wav",
+    "moan": "assets/audio/moan.wav",
+    "pick": "assets/audio/pick.wav",
+}
+# when every voice is in use, a sound takes over the voice of a lower priority one or is dropped
+SFX_PRIORITIES = {
+    "scoot": 0,
+    "pling": 1,
+    "chew": 2,
+    "pick": 2,
+    "moan": 3,
+}
+
 class SoundManager:
+    """
+    Plays sound effects through a fixed pool of mixer channels
+    Effects are decoded on a background thread when the manager is created, or on first use if
+    that thread isn't done with them yet. An effect queued several times before the queue is
+    played plays once, and at most `max_voices` effects play at the same time
+    """
 
-    def __init__(self):
-        self.cacheSfx()
+    def __init__(self, channels: int = 8, max_voices: int = 4, preload: bool = True):
+        pygame.mixer.init()
+        pygame.mixer.set_num_channels(channels)
+        self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+        # priority of the effect each channel played last
+        self.channel_priorities = [0] * channels
+        self.max_voices = min(max_voices, channels)
 
-        self.sfx_bus = []
+        self.sfx: Dict[str, pygame.mixer.Sound] = {}
+        # held while decoding, so an effect is never decoded twice
+        self.sfx_lock = threading.Lock()
+        # a dict used as an insertion ordered set of effect names
+        self.sfx_bus: Dict[str, None] = {}
+        if preload:
+            threading.Thread(target=self.cacheSfx, daemon=True).start()
 
     def playBgm(self, file: str):
         pygame.mixer.music.load(file)
@@ -19,27 +55,48 @@ class SoundManager:
         pygame.mixer.music.unpause()
 
     def queueSfx(self, sfx_name: str):
-        if len(self.sfx) == 0:
-            self.cacheSfx()
-        self.sfx_bus.append(self.sfx[sfx_name])
+        if sfx_name not in SFX_FILES:
+            raise KeyError(sfx_name)
+        self.sfx_bus[sfx_name] = None
 
     def playSfxQueue(self):
-        if len(self.sfx_bus) > 0:
-            for s in self.sfx_bus:
-                s.play()
-                self.sfx_bus.remove(s)
+        """play the queued effects, the highest priority ones first"""
+        if not self.sfx_bus:
+            return
+        queued = sorted(self.sfx_bus, key=lambda name: SFX_PRIORITIES.get(name, 0), reverse=True)
+        self.sfx_bus.clear()
+        for sfx_name in queued:
+            priority = SFX_PRIORITIES.get(sfx_name, 0)
+            channel_index = self.getChannel(priority)
+            if channel_index is None:
+                continue # every voice plays something more important
+            self.channels[channel_index].play(self.getSfx(sfx_name))
+            self.channel_priorities[channel_index] = priority
 
-    def cacheSfx(self):
-        pygame.mixer.init()
-        self.sfx = {
-            "scoot": pygame.mixer.Sound("assets/audio/scoot.wav"),
-            "pling": pygame.mixer.Sound("assets/audio/pling.wav"),
-            "chew": pygame.mixer.Sound("assets/audio/chew.wav"),
-            "moan": pygame.mixer.Sound("assets/audio/moan.wav"),
-            "pick": pygame.mixer.Sound("assets/audio/pick.wav"),
-        }
-
-    def clearSfxCache(self):
-        self.sfx = {}
+    def getChannel(self, priority: int) -> Optional[int]:
+        """
+        return the index of a channel to play an effect with the given priority on, stopping
+        the lowest priority voice if all are in use, or None if none has a lower priority
+        """
+        busy: List[int] = [i for i, channel in enumerate(self.channels) if channel.get_busy()]
+        if len(busy) < self.max_voices:
+            return next(i for i, channel in enumerate(self.channels) if i not in busy)
+        lowest = min(busy, key=lambda i: self.channel_priorities[i])
+        if self.channel_priorities[lowest] >= priority:
+            return None
+        self.channels[lowest].stop()
+        return lowest
 
+    def getSfx(self, sfx_name: str) -> pygame.mixer.Sound:
+        """return an effect, decoding it if it isn't cached yet"""
+        sound = self.sfx.get(sfx_name)
+        if sound is None:
+            with self.sfx_lock:
+                sound = self.sfx.get(sfx_name)
+                if sound is None:
+                    sound = self.sfx[sfx_name] = pygame.mixer.Sound(SFX_FILES[sfx_name])
+        return sound
 
+    def cacheSfx(self):
+        for sfx_name in SFX_FILES:
+            self.getSfx(sfx_name)
@@ -0,0 +1,11 @@
+import os
+import sys
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the game loads its assets relative to the project root
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+warnings.simplefilter("ignore") # tcod deprecation warnings from the tileset setup
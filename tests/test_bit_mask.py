@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from bit_mask import BitMask
+
+def test_cells_match_a_bool_array():
+    array = np.random.default_rng(1).random((10, 13)) > 0.5
+    mask = BitMask.from_array(array)
+
+    assert (mask.to_array() == array).all()
+    assert mask[3, 12] == array[3, 12]
+    assert mask[-1, -1] == array[-1, -1]
+    xs, ys = np.array([0, 9, -1]), np.array([0, 12, -13])
+    assert (mask[xs, ys] == array[xs, ys]).all()
+    assert (mask[2:5, 3:11] == array[2:5, 3:11]).all()
+    assert (mask[:, -5:] == array[:, -5:]).all()
+
+def test_writes_match_a_bool_array():
+    array = np.zeros((10, 13), dtype=bool)
+    mask = BitMask((10, 13))
+    for target in (array, mask):
+        target[1, 4] = True
+        target[-1, -1] = True
+        target[2:6, 5:12] = True
+        target[3:5, 7:9] = False
+
+    assert (mask.to_array() == array).all()
+
+def test_negative_indices_skip_the_padding():
+    mask = BitMask((10, 13), fill_value=False)
+    mask |= BitMask((10, 13), fill_value=True)
+
+    assert mask[-1, -1]
+    mask[-1, -1] = False
+    assert not mask[9, 12]
+
+@pytest.mark.parametrize("y", [13, 15, 16, -14])
+def test_indices_outside_of_the_mask_raise(y):
+    mask = BitMask((4, 13), fill_value=True)
+
+    with pytest.raises(IndexError):
+        mask[0, y]
+    with pytest.raises(IndexError):
+        mask[0, y] = False
+    with pytest.raises(IndexError):
+        mask[np.array([0, 1]), np.array([0, y])]
@@ -0,0 +1,54 @@
+import actions
+import setup_game
+
+def test_dropped_item_is_kept_across_floor_change():
+    engine = setup_game.new_game(1)
+    dagger = engine.player.inventory.items[0]
+    actions.DropItem(engine.player, dagger).perform()
+    location = (dagger.x, dagger.y)
+
+    engine.player.place(*engine.game_map.downstairs_location)
+    actions.TakeStairsAction(engine.player).perform()
+    assert engine.game_world.current_floor == 2
+
+    engine.game_world.change_floor(1)
+    assert [
+        item.name for item in engine.game_map.items if (item.x, item.y) == location
+    ] == ["Dagger"]
+
+def test_evicted_floor_is_restored_from_an_earlier_save(tmp_path):
+    filename = str(tmp_path / "test.sav")
+    engine = setup_game.new_game(1)
+    engine.game_world.floor_cache.memory_budget = 0
+    dagger = engine.player.inventory.items[0]
+    actions.DropItem(engine.player, dagger).perform()
+    location = (dagger.x, dagger.y)
+    engine.player.place(*engine.game_map.downstairs_location)
+    actions.TakeStairsAction(engine.player).perform()
+    engine.save_as(filename)
+
+    # going back up takes the floor out of the store, the save keeps it
+    engine.game_world.change_floor(1)
+    loaded = setup_game.load_game(filename)
+    loaded.game_world.change_floor(1)
+    assert [
+        item.name for item in loaded.game_map.items if (item.x, item.y) == location
+    ] == ["Dagger"]
+
+def test_leaving_a_floor_does_not_generate_it_again():
+    engine = setup_game.new_game(1)
+    game_world = engine.game_world
+    game_world.pregenerate = False
+    game_map = engine.game_map
+    x, y = game_map.downstairs_location
+    game_map.tiles[x + 1, y] = game_map.tiles[x, y]
+    built = []
+    build_floor = game_world.build_floor
+    game_world.build_floor = lambda floor_number: built.append(floor_number) or build_floor(floor_number)
+
+    game_world.change_floor(2)
+    assert 1 not in built
+    # only restoring the floor generates it
+    game_world.change_floor(1)
+    assert built.count(1) == 1
+    assert engine.game_map.tiles[x + 1, y] == engine.game_map.tiles[x, y]
@@ -0,0 +1,38 @@
+import numpy as np
+import tcod
+
+import setup_game
+import tile_types
+
+def compose(game_map):
+    tiles = tile_types.palette[game_map.tiles]
+    composed = np.full((game_map.width, game_map.height), tile_types.SHROUD, order="F")
+    np.copyto(composed, tiles["dark"], where=game_map.explored[:, :])
+    np.copyto(composed, tiles["light"], where=game_map.visible[:, :])
+    return composed
+
+def test_only_the_tiles_in_view_are_rendered():
+    engine = setup_game.new_game(2)
+    game_map = engine.game_map
+    console = tcod.console.Console(engine.camera.width, engine.camera.height, order="F")
+    for step in range(20):
+        engine.player.place(engine.player.x + 1, engine.player.y)
+        game_map.follow(engine.player)
+        engine.update_fov()
+        if step % 5 == 0:
+            game_map.tiles[engine.player.x, engine.player.y + 1] = tile_types.wall
+            game_map.mark_tiles_changed((slice(engine.player.x, engine.player.x + 1), slice(None)))
+        engine.camera.update(engine.player)
+        game_map.render(console, engine.camera)
+
+        screen_view, map_view = engine.camera.get_views(game_map.width, game_map.height)
+        assert game_map.rendered_tiles.shape == console.tiles_rgb[screen_view].shape
+        assert np.array_equal(console.tiles_rgb[screen_view]["bg"], compose(game_map)[map_view]["bg"])
+
+def test_generated_maps_can_go_without_an_actor_store():
+    engine = setup_game.new_game(1)
+    engine.game_world.use_actor_store = False
+    engine.game_world.change_floor(3)
+    assert engine.game_map.actor_store is None
+    engine.game_world.generate_overworld()
+    assert engine.game_map.actor_store is None
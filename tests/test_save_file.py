@@ -0,0 +1,112 @@
+import lzma
+import os
+import pickle
+import random
+
+import pytest
+
+import actions
+import columnar
+import input_handlers
+import setup_game
+from save_file import RECORD_HEADER, SaveFile, SaveMetadata
+
+def get_state(engine):
+    return sorted(
+        (entity.name, entity.x, entity.y, getattr(getattr(entity, "fighter", None), "hp", None),
+         repr(getattr(getattr(entity, "ai", None), "path", None)))
+        for entity in engine.game_map.entities
+    ), [item.name for item in engine.player.inventory.items], engine.game_map.explored.bits.tobytes()
+
+def test_deltas_reload_the_same_game(tmp_path):
+    random.seed(2)
+    filename = str(tmp_path / "test.sav")
+    engine = setup_game.new_game(1)
+    engine.autosave_interval = 1000
+    engine.player.fighter.max_hp = engine.player.fighter.hp = 1000
+    handler = input_handlers.MainGameEventHandler(engine)
+    engine.save_as(filename)
+    for _ in range(30):
+        handler.handle_action(actions.BumpAction(engine.player, *random.choice([(1, 0), (0, 1), (-1, 0), (0, -1)])))
+        engine.save_as(filename)
+    actions.DropItem(engine.player, engine.player.inventory.items[0]).perform()
+    engine.save_as(filename)
+
+    assert engine.save_file.delta_count == 31
+    assert get_state(setup_game.load_game(filename)) == get_state(engine)
+
+def test_delta_only_saves_changed_entities(tmp_path):
+    engine = setup_game.new_game(1)
+    save_file = engine.save_file = SaveFile(str(tmp_path / "test.sav"))
+    save_file.save(engine)
+    written = []
+    save_file.write_delta = lambda data, metadata, codec: written.append(pickle.loads(data))
+    engine.player.fighter.hp -= 1
+    save_file.save(engine)
+
+    assert [save_file.entities[key] for key in written[0]["entities"]] == [engine.player]
+
+def test_saves_without_records_are_rejected(tmp_path):
+    filename = tmp_path / "old.sav"
+    filename.write_bytes(lzma.compress(pickle.dumps(None)))
+
+    with pytest.raises(ValueError):
+        SaveFile.load(str(filename))
+
+def test_garbled_last_delta_is_ignored(tmp_path):
+    filename = str(tmp_path / "test.sav")
+    engine = setup_game.new_game(1)
+    engine.save_as(filename)
+    engine.player.fighter.hp -= 1
+    engine.save_as(filename)
+    size = os.path.getsize(filename)
+    engine.player.fighter.hp -= 1
+    engine.save_as(filename)
+    # the header of the last record is intact, its payload isn't
+    with open(filename, "r+b") as f:
+        f.seek(size + RECORD_HEADER.size)
+        f.write(b"\0" * (os.path.getsize(filename) - f.tell()))
+
+    loaded = setup_game.load_game(filename)
+    assert loaded.player.fighter.hp == engine.player.fighter.hp + 1
+    assert loaded.save_file.needs_base
+
+def test_evicted_chunks_are_saved_with_the_game(tmp_path):
+    filename = str(tmp_path / "test.sav")
+    engine = setup_game.new_game(2)
+    game_map = engine.game_map
+    game_map.max_resident_chunks = 25
+    for _ in range(200):
+        engine.player.place(engine.player.x + 1, engine.player.y)
+        game_map.follow(engine.player)
+        engine.save_as(filename)
+    stored = engine.disk_store.read_all()
+    assert stored
+    # the files are saved next to the engine, not pickled with it
+    assert not pickle.loads(pickle.dumps(engine.disk_store)).get_names()
+
+    # a new game has a disk store of its own
+    assert not os.listdir(setup_game.new_game(2).disk_store.directory)
+    assert setup_game.load_game(filename).disk_store.read_all() == stored
+
+def test_uncompressed_base_is_mapped_copy_on_write(tmp_path):
+    filename = str(tmp_path / "test.sav")
+    engine = setup_game.new_game(1)
+    engine.save_file = SaveFile(filename, codec="none")
+    engine.save_file.save(engine)
+
+    loaded = setup_game.load_game(filename)
+    assert columnar.is_mapped(loaded.game_map.tiles)
+    loaded.game_map.tiles[0, 0] = 3
+    assert setup_game.load_game(filename).game_map.tiles[0, 0] == engine.game_map.tiles[0, 0]
+
+def test_saves_of_another_version_are_rejected(tmp_path):
+    filename = str(tmp_path / "test.sav")
+    engine = setup_game.new_game(1)
+    engine.save_as(filename)
+    with open(filename, "r+b") as f:
+        f.write(b"RLSAVE\x03\n")
+
+    assert SaveMetadata.read(filename) is None
+    with pytest.raises(ValueError):
+        SaveFile.load(filename)
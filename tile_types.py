@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import List, Tuple
 
 import numpy as np
 
@@ -19,15 +19,25 @@ tile_dt = np.dtype(
     ]
 )
 
+# maps store the id of each tile, an index into the palette of every tile type
+tile_id_dt = np.uint8
+tile_records: List[Tuple] = []
+palette = np.array(tile_records, dtype=tile_dt)
+
 def new_tile(
         *, # enforce the use of keywords, so parameter order doesnt matter
         walkable: int,
         transparent: int,
         dark: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
         light: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
-) -> np.ndarray:
-    """Helper function for defining individual tile types"""
-    return np.array((walkable, transparent, dark, light), dtype=tile_dt)
+) -> int:
+    """Helper function for defining individual tile types, returns the id of the new tile"""
+    global palette
+    tile_id = len(tile_records)
+    assert tile_id <= np.iinfo(tile_id_dt).max, "too many tile types for the tile id type"
+    tile_records.append((walkable, transparent, dark, light))
+    palette = np.array(tile_records, dtype=tile_dt)
+    return tile_id
 
 # SHROUD represents unexplored, unseen tiles
 SHROUD = np.array((ord(" "), (255, 255, 255), (5, 5, 5)), dtype=graphic_dt)
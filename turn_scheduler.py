@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import heapq
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from entity import Actor
+
+# time it takes an actor with normal speed to perform one action
+TURN_LENGTH = 100
+NORMAL_SPEED = 100
+# dormant actors are grouped in square regions of this size, so waking only looks at nearby regions
+DORMANT_REGION_SIZE = 16
+
+class TurnScheduler:
+    """
+    Keeps the actors of a map in a priority queue ordered by the time of their next action
+    Actors with the same time act in the order they were scheduled, so turn order is deterministic
+    Dormant actors are taken out of the queue entirely and cost nothing until they are woken up
+    """
+
+    def __init__(self) -> None:
+        self.time = 0
+        self.queue: List[Tuple[int, int, Actor]] = []
+        # the sequence number of each actor's entry that is still valid, other entries are skipped
+        self.scheduled: Dict[Actor, int] = {}
+        self.sequence = 0
+        # dicts are used as insertion ordered sets, so actors wake up in a deterministic order
+        self.dormant: Dict[Tuple[int, int], Dict[Actor, None]] = {}
+        # time until which an actor that heard a noise stays awake, even far from the player
+        self.alerted_until: Dict[Actor, int] = {}
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # entries that would be skipped aren't saved, a sorted list is a valid heap
+        state["queue"] = sorted(entry for entry in self.queue if self.scheduled.get(entry[2]) == entry[1])
+        return state
+
+    @staticmethod
+    def action_delay(actor: Actor) -> int:
+        """return the time between two actions of an actor, faster actors act more often"""
+        return max(1, TURN_LENGTH * NORMAL_SPEED // actor.speed)
+
+    def schedule(self, actor: Actor, delay: Optional[int] = None) -> None:
+        """
+        schedule the next action of an actor, replacing any earlier entry
+        by default the actor waits one full action delay, so it doesnt act before time passes
+        """
+        if delay is None:
+            delay = self.action_delay(actor)
+        self.push(actor, self.time + delay)
+
+    def push(self, actor: Actor, time: int) -> None:
+        self.sequence += 1
+        self.scheduled[actor] = self.sequence
+        heapq.heappush(self.queue, (time, self.sequence, actor))
+
+    def unschedule(self, actor: Actor) -> None:
+        """stop scheduling an actor. Its entry stays in the queue, but will be skipped"""
+        self.scheduled.pop(actor, None)
+        self.alerted_until.pop(actor, None)
+        dormant_in_region = self.dormant.get(self.get_region(actor.x, actor.y))
+        if dormant_in_region:
+            dormant_in_region.pop(actor, None)
+
+    @staticmethod
+    def get_region(x: int, y: int) -> Tuple[int, int]:
+        return x // DORMANT_REGION_SIZE, y // DORMANT_REGION_SIZE
+
+    def sleep(self, actor: Actor) -> None:
+        """take an actor out of the queue until it is woken up. The actor must not move while asleep"""
+        self.unschedule(actor)
+        self.dormant.setdefault(self.get_region(actor.x, actor.y), {})[actor] = None
+
+    def is_alerted(self, actor: Actor) -> bool:
+        """return True if the actor heard a noise recently and should stay awake"""
+        alerted_until = self.alerted_until.get(actor)
+        if alerted_until is None:
+            return False
+        if alerted_until <= self.time:
+            del self.alerted_until[actor]
+            return False
+        return True
+
+    def wake_near(self, x: int, y: int, radius: int, alert_duration: int = 0) -> None:
+        """
+        wake up the dormant actors within `radius` tiles (chebyshev distance) of x, y
+        they act after their usual action delay, and stay awake for at least `alert_duration`
+        """
+        region_x1, region_y1 = self.get_region(x - radius, y - radius)
+        region_x2, region_y2 = self.get_region(x + radius, y + radius)
+        for region_x in range(region_x1, region_x2 + 1):
+            for region_y in range(region_y1, region_y2 + 1):
+                dormant_in_region = self.dormant.get((region_x, region_y))
+                if not dormant_in_region:
+                    continue
+                for actor in [
+                    actor
+                    for actor in dormant_in_region
+                    if max(abs(actor.x - x), abs(actor.y - y)) <= radius
+                ]:
+                    del dormant_in_region[actor]
+                    self.schedule(actor)
+                    if alert_duration:
+                        self.alerted_until[actor] = self.time + alert_duration
+                if not dormant_in_region:
+                    del self.dormant[(region_x, region_y)]
+
+    def advance(self, duration: int) -> None:
+        """let time pass, e.g. for the duration of the player's action"""
+        self.time += duration
+
+    def next_actor(self) -> Optional[Actor]:
+        """
+        return the next actor whose action is due, and schedule its following action
+        returns None when no more actors can act at the current time
+        """
+        while self.queue and self.queue[0][0] <= self.time:
+            time, sequence, actor = heapq.heappop(self.queue)
+            if self.scheduled.get(actor) != sequence:
+                continue # unscheduled or rescheduled since this entry was added
+            if not actor.is_alive:
+                self.unschedule(actor)
+                continue
+            # count from when the action was due, so fast actors can act several times per turn
+            self.push(actor, time + self.action_delay(actor))
+            return actor
+        return None
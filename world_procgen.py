@@ -1,32 +1,51 @@
-from perlin_noise import PerlinNoise
+import numpy as np
+import tcod
 
+from bit_mask import BitMask
 import tile_types
 from engine import Engine
-from game_map import WorldGameMap
+from game_map import Chunk, WorldGameMap
 
 
-def generate_world(world_width: int, world_height: int, engine: Engine):
+# number of tiles the octaves of the height map are spread across
+WORLD_NOISE_SCALE = 100
+
+def generate_world(
+        world_width: int, world_height: int, engine: Engine, seed: int = 1, use_actor_store: bool = True
+):
     player = engine.player
-    dungeon = WorldGameMap(engine, world_width, world_height, entities=[player])
-    generate_world_at(
-        start_x=0,
-        start_y=0,
-        len_x=world_width,
-        len_y=world_height,
-        dungeon=dungeon
+    dungeon = WorldGameMap(
+        engine, world_width, world_height, entities=[player], seed=seed, use_actor_store=use_actor_store
     )
+    dungeon.load_window((0, 0))
     player.place(int(world_width / 2), int(world_height / 2), dungeon)
     return dungeon
 
-def generate_world_at(start_x: int, start_y: int, len_x: int, len_y: int, dungeon: WorldGameMap):
-    noise = PerlinNoise(octaves=10, seed=1)
-
-    for x in range(start_x, len_x):
-        for y in range(start_y, len_y):
-            noise_val = noise([x/len_x, y/len_y]) + .5
-            if noise_val > 0.65:
-                dungeon.tiles[x, y] = tile_types.brush
-            elif noise_val > 0.35:
-                dungeon.tiles[x, y] = tile_types.grass
-            elif noise_val > 0.30:
-                dungeon.tiles[x, y] = tile_types.sand
\ No newline at end of file
+def get_height_map(x: np.ndarray, y: np.ndarray, octaves: int = 10, seed: int = 1) -> np.ndarray:
+    """
+    return a 2d array of perlin noise heights, centered around 0.5, for every x, y combination
+    x and y are fractions of the world noise scale, and `octaves` is the number of noise cycles
+    across it. The whole array is sampled in one pass, and is always the same for the same seed
+    """
+    noise = tcod.noise.Noise(dimensions=2, algorithm=tcod.noise.Algorithm.PERLIN, seed=seed)
+    return noise.sample_ogrid([x * octaves, y * octaves]) + .5
+
+def generate_world_at(start_x: int, start_y: int, len_x: int, len_y: int, seed: int) -> np.ndarray:
+    """return the tiles of an area of the world, given in world coordinates"""
+    noise_val = get_height_map(
+        np.arange(start_x, start_x + len_x) / WORLD_NOISE_SCALE,
+        np.arange(start_y, start_y + len_y) / WORLD_NOISE_SCALE,
+        seed=seed
+    )
+
+    # anything below the sand stays water. Higher tiles overwrite lower ones
+    tiles = np.full((len_x, len_y), fill_value=tile_types.water, dtype=tile_types.tile_id_dt, order="F")
+    tiles[noise_val > 0.30] = tile_types.sand
+    tiles[noise_val > 0.35] = tile_types.grass
+    tiles[noise_val > 0.65] = tile_types.brush
+    return tiles
+
+def generate_chunk(chunk_x: int, chunk_y: int, size: int, seed: int) -> Chunk:
+    tiles = generate_world_at(chunk_x * size, chunk_y * size, size, size, seed)
+    explored = BitMask((size, size), fill_value=True)
+    return Chunk(chunk_x, chunk_y, tiles, explored)